@@ -1,12 +1,12 @@
-import geopandas
-from rdflib import Graph
-from rdfpandas.graph import to_dataframe
 import logging
 from pathlib import Path
 
+from spatialkg.geometries import features_dataframe
+
 def get_region_ttl(source, boundary):
     '''
     Get region (boundary) for a set of two ttl file series with spatial geometry
+    Returns the source and boundary features (geo:defaultGeometry -> geo:asWKT) as GeoDataFrames
     '''
     ## initiate log file
     logname = "log"
@@ -17,38 +17,14 @@ def get_region_ttl(source, boundary):
                         level=logging.DEBUG)
 
     logging.info(f"Running spatial join for {source} to {boundary}")
-    #kg = Initial_KG(_PREFIX)
-    kg = Graph()
-    #open the file and read data
-    with open(boundary,'r') as bound:
-        boundary_file = bound.read()
-    with open(source, 'r') as src:
-        source_file = src.read()
-    kg.parse(data=boundary_file, format='turtle')
-    q = """
-        PREFIX geo: <http://www.opengis.net/ont/geosparql#>
-        select * where { 
-	        ?s rdf:type geo:Geometry .
-	        ?feature geo:hasDefaultGeometry ?s .
-	        ?s geo:asWKT ?wkt .
-        }
-    """
-    i=0
-    i2=0
-    bound_graph = kg.query(q)
-    for s, feature, wkt in bound_graph:
-        i+=1
-    print('boundary features: ', i)
-
-    kg2 = Graph()
-    kg2.parse(data=source_file, format='turtle')
-    for s, feature, wkt in kg2.query(q):
-        i2+=1
-    print('source features:', i2)
-    df_boundary = to_dataframe(kg)
-    #df_boundary = df_boundary[df_boundary['geo:asWKT{Literal}'].dropna()]
+    # Stream the features and their geometries out of the files (no RDFLib graph is built)
+    df_boundary = features_dataframe(boundary)
+    print('boundary features: ', len(df_boundary))
+    df_source = features_dataframe(source)
+    print('source features:', len(df_source))
     print(df_boundary.info())
     print(df_boundary.head())
+    return df_source, df_boundary
 def triplify_geom(source, boundary):
     '''
 
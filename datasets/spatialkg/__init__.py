@@ -0,0 +1,71 @@
+"""SAWGraph spatial knowledge graph library
+
+The functions of the dataset scripts in this folder (states, counties, county subdivisions, S2 cells, S2 cell
+integration, and class statements) as an importable package. Importing the package has no side effects: it does
+not change the working directory, configure logging, patch ssl, or import pandas, geopandas, rdflib, or
+SPARQLWrapper. Submodules (and their dependencies) are imported on first use of one of the names below.
+
+Modules:
+    * config - paths, KWG endpoint, logging / ssl / working directory setup (called explicitly by scripts)
+    * namespaces - loads the project namespaces (_PREFIX) from the local namespaces.py file
+    * fips - cached State-County-FIPS table lookups
+    * kwg - KnowWhereGraph SPARQL queries over a reusable HTTP session
+    * admin_regions - states (level 1), counties (level 2), and county subdivisions (level 3)
+    * s2_cells - S2 cells and their KWG integration with states and counties
+    * class_statements - class statement only .ttl files for S2 cells and administrative regions
+    * s2_cell_ranges - compact SPARQL filters for sets of S2 cells
+    * s2_cell_hierarchy - S2 cell parents, children, and neighbors from cell IDs
+    * s2_cell_integration - local S2 cell integration with county subdivision polygons
+    * s2_cell_rollup - S2 cell integration rolled up the administrative region hierarchy
+    * geometries - features and geometries of .ttl files as a GeoDataFrame / GeoParquet file (no graph is built)
+    * terms - shared RDFLib term factory (vectorized IRI columns and interned terms)
+    * turtle - statement-by-statement Turtle / N-Triples reader (no graph is built)
+    * validate - single-pass structural validation of generated .ttl files
+    * vintage_diff - triples added and removed between two builds, as RDF Patch or SPARQL Update
+    * upload - parallel chunked uploads to a SPARQL Graph Store Protocol endpoint (and a local stand-in store)
+    * worker - a long-running worker that processes state build jobs from a local queue
+    * partition - S2 cell and S2 integration files split by coarse S2 parent cell, with a manifest
+    * build - builds many states at once, running each stage as soon as its inputs are ready
+"""
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    'get_prefixes': 'namespaces',
+    'read_fips_table': 'fips',
+    'get_state_identifiers': 'fips',
+    'kwg_dataframe': 'kwg',
+    'admin_regions_level1_2ttl': 'admin_regions',
+    'admin_regions_level2_2ttl': 'admin_regions',
+    'county_subs_2ttl': 'admin_regions',
+    'state_s2_cells_2ttl': 's2_cells',
+    'state_s2_cell_integration_2ttl': 's2_cells',
+    'county_s2_cell_integration_2ttl': 's2_cells',
+    'state_s2_cell_rollup_2ttl': 's2_cells',
+    'state_s2_cell_class_stmts_2ttl': 'class_statements',
+    'state_admin_region_class_stmts_2ttl': 'class_statements',
+    'county_subs_s2_cell_integration_2ttl': 's2_cell_integration',
+    's2_cell_rollup_2ttl': 's2_cell_rollup',
+    'part_of_closure_2ttl': 's2_cell_rollup',
+    'read_triples': 'turtle',
+    'features_dataframe': 'geometries',
+    'features_2parquet': 'geometries',
+    'validate_files': 'validate',
+    'diff_files': 'vintage_diff',
+    'write_delta': 'vintage_diff',
+    'GraphStoreLoader': 'upload',
+    'upload_files': 'upload',
+    'submit_job': 'worker',
+    'serve': 'worker',
+    'run_build': 'build',
+    'partition_file': 'partition',
+    'partition_state_outputs': 'partition',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module('.' + _EXPORTS[name], __name__), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
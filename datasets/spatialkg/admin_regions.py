@@ -0,0 +1,336 @@
+"""Administrative regions: states (level 1), counties (level 2), and county subdivisions (level 3)
+
+States constitute level 1 admin regions per KWG (kwg-ont:AdministrativeRegion_1)
+   The US has 51 including the District of Columbia (territories are ignored)
+Counties constitute level 2 admin regions per KWG (kwg-ont:AdministrativeRegion_2)
+   The number of counties per state varies substantially
+County subdivisions constitute level 3 admin regions per KWG (kwg-ont:AdministrativeRegion_3)
+
+States and counties are retrieved from KWG (https://stko-kwg.geog.ucsb.edu/graphdb); county subdivisions are read
+from US Census Bureau TIGER shapefiles (https://www.census.gov/cgi-bin/geo/shapefiles/index.php)
+
+Required:
+    * geopandas
+    * pandas
+    * rdflib (Graph and Literal)
+    * rdflib.namespace (GEO, OWL, RDF, RDFS, and XSD)
+    * logging
+
+Functions:
+    * initial_kg - initialize an RDFLib knowledge graph with project namespaces
+    * admin_regions_level1_2ttl - queries KWG for states and creates a .ttl file of the results
+    * admin_regions_level2_2ttl - queries KWG for state county info and creates one .ttl file for each state
+    * get_input_file_name - Takes a state's FIPS code and creates the county subdivision shapefile path/name string
+    * get_output_file_name - Takes a state abbreviation and its FIPS code and creates a file path/name string
+    * get_s2_file_name - Takes a state abbreviation and its FIPS code and returns the state's S2 cell file path/name
+    * get_s2_output_file_name - Takes a state abbreviation and its FIPS code and creates a file path/name string
+    * get_part_of_closure_file_name - Takes a state abbreviation and its FIPS code and creates a file path/name string
+    * build_iris - build IRIs for a given county subdivision and its geometry
+    * county_subs_2ttl - triplify county subdivisions for a given state and write to a .ttl file
+"""
+import geopandas as gpd
+import pandas as pd
+from rdflib import Graph, Literal
+from rdflib.namespace import GEO, OWL, RDF, RDFS, XSD
+
+import logging
+
+from .config import KWG_RESOURCE, LEVEL3_OUTPATH, S2_OUTPATH
+from .fips import add_state_abbrev, read_fips_table
+from .kwg import kwg_dataframe
+from .namespaces import get_prefixes
+
+logger = logging.getLogger(__name__)
+
+
+def initial_kg(_PREFIX: dict) -> Graph:
+    """Create an empty knowledge graph with project namespaces
+
+    :param _PREFIX: a dictionary of project namespaces
+    :return: an empty RDFLib graph with project namespaces
+    """
+    graph = Graph()
+    for prefix in _PREFIX:
+        graph.bind(prefix, _PREFIX[prefix])
+    return graph
+
+
+def admin_regions_level1_2ttl(endpoint: str, outfile: str) -> list:
+    """Creates a single .ttl file of state information from KWG and returns a list of KWG state IRIs
+
+    :param endpoint: the KWG SPARQL endpoint URL
+    :param outfile: a path and filename for the output .ttl file
+    :return: a list of KWG IRIs for the US states
+    """
+    _PREFIX = get_prefixes()
+    # Query to retrieve the state IRIs
+    logger.info('Retrieve state IRIs from KWG')
+    query = """
+        PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+        PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+
+        SELECT * WHERE {
+            ?state kwg-ont:administrativePartOf kwgr:administrativeRegion.USA ;
+                   rdf:type kwg-ont:AdministrativeRegion_1 ;
+        } ORDER BY ?state
+        """
+    df = kwg_dataframe(endpoint, query)  # execute the query and return the results as a dataframe
+    state_iris = df['state'].to_list()  # convert the state column to a list
+    logger.info('Intialize RDFLib Graph for states')
+    kg = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+    # Query each state and add the resulting KWG info to the KG
+    logger.info('Retrieve basic state info for each state from KWG and triplify')
+    for state in state_iris:
+        # Query to retrieve state info
+        query = """
+            PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+            PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+            PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+            SELECT * WHERE {
+                <""" + state + """> rdfs:label ?label ;
+                                  kwg-ont:administrativePartOf ?within ;
+                                  kwg-ont:hasFIPS ?fips ;
+                                  geo:hasGeometry ?geom .
+                ?geom rdfs:label ?geom_label ;
+                      geo:asWKT ?wkt .
+            }
+            """
+        df_temp = kwg_dataframe(endpoint, query)  # execute the query and return the results as a dataframe
+        df_temp['fips'] = df_temp['fips'].astype(str)  # convert the fips column to strings
+        df_temp['fips'] = df_temp['fips'].str.zfill(2)  # pad single digit fips codes with a leading 0
+
+        # Triplify the current state info if the query returned a single row and it isn't for a territory
+        if df_temp.shape[0] == 1 and int(df_temp['fips'].iloc[0]) < 60:
+            # Create IRIs
+            state_iri = _PREFIX['kwgr'][state.replace(KWG_RESOURCE, '')]
+            usa_iri = _PREFIX['kwgr'][df_temp['within'].iloc[0].replace(KWG_RESOURCE, '')]
+            geom_iri = _PREFIX['kwgr'][df_temp['geom'].iloc[0].replace(KWG_RESOURCE, '')]
+
+            # Create triples
+            kg.add((state_iri, RDF.type, _PREFIX['kwg-ont']['AdministrativeRegion_1']))
+            kg.add((state_iri, OWL.sameAs, _PREFIX['dcgeoid'][df_temp['fips'].iloc[0]]))
+            kg.add((state_iri, RDFS.label, Literal(df_temp['label'].iloc[0], datatype=XSD.string)))
+            kg.add((state_iri, _PREFIX['kwg-ont']['administrativePartOf'], usa_iri))
+            kg.add((state_iri, _PREFIX['kwg-ont']['hasFIPS'], Literal(df_temp['fips'].iloc[0], datatype=XSD.string)))
+            kg.add((state_iri, GEO.defaultGeometry, geom_iri))
+            kg.add((state_iri, GEO.hasGeometry, geom_iri))
+            kg.add((geom_iri, RDF.type, GEO.Geometry))
+            kg.add((geom_iri, RDFS.label, Literal(df_temp['geom_label'].iloc[0], datatype=XSD.string)))
+            kg.add((geom_iri, GEO.asWKT, Literal(df_temp['wkt'].iloc[0], datatype=GEO.wktLiteral)))
+        # Alert the user if the state query returned more (or less) than one row
+        elif df_temp.shape[0] != 1:
+            logger.info(f"   State query for {state} returned {df_temp.shape[0]} rows; expected 1")
+            print(f"State query for {state} returned {df_temp.shape[0]} rows; expected 1")
+        # Alert the user when a territory is skipped
+        else:
+            logger.info(f"   Skipped {df_temp['label'].iloc[0]}")
+            print(f"Skipped {df_temp['label'].iloc[0]}")
+    logger.info(f'Write state triples to {outfile}')
+    kg.serialize(outfile, format='turtle')    # Write the completed KG to a .ttl file
+    return state_iris  # These are needed for processing the counties by state
+
+
+def admin_regions_level2_2ttl(endpoint: str, outpath: str, iris: list) -> None:
+    """Creates one .ttl file per state with that state's county information
+
+    :param endpoint: the KWG SPARQL endpoint URL
+    :param outpath: a path for the output .ttl files
+    :param iris: a list of KWG state IRIs
+    :return: None
+    """
+    _PREFIX = get_prefixes()
+    # Process each state's counties one state at a time
+    logger.info("Process each state's counties")
+    for state in iris:
+        kg = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+        # Query KWG for a state's fips code, name, and counties
+        query1 = """
+            PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+            PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+            SELECT * WHERE {
+                <""" + state + """> kwg-ont:hasFIPS ?state_fips ;
+                                    rdfs:label ?state_label .
+                ?county kwg-ont:administrativePartOf <""" + state + """> ;
+                        rdf:type kwg-ont:AdministrativeRegion_2 .
+            } ORDER BY ?county
+            """
+        df_county = kwg_dataframe(endpoint, query1)  # execute the query and return the results as a dataframe
+        # Process the query results if the state is not a territory
+        if int(df_county['state_fips'].iloc[0]) < 60:
+            df_county['state_fips'] = df_county['state_fips'].astype(str)  # convert the state_fips to strings
+            df_county['state_fips'] = df_county['state_fips'].str.zfill(2)  # pad single digit fips with a leading 0
+            df_county = add_state_abbrev(df_county)  # add two-letter state abbreviations to the dataframe
+            county_iris = df_county['county'].to_list()  # create a list of the current state's counties
+            # Process each county in the current state
+            for county in county_iris:
+                # Query KWG for info on the current county
+                query2 = """
+                    PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+                    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+                    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+                    PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+                    PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+                    SELECT * WHERE {
+                        <""" + county + """> rdfs:label ?label ;
+                                          kwg-ont:administrativePartOf ?within ;
+                                          kwg-ont:hasFIPS ?fips ;
+                                          geo:hasGeometry ?geom .
+                        ?geom rdfs:label ?geom_label ;
+                              geo:asWKT ?wkt .
+                    }
+                    """
+                df_temp = kwg_dataframe(endpoint, query2)  # execute the query and return the results as a dataframe
+                df_temp['fips'] = df_temp['fips'].astype(str)  # convert the fips column to strings
+                df_temp['fips'] = df_temp['fips'].str.zfill(5)  # pad 4 digit fips codes with a leading 0
+                # Triplify the county info as long as only one county was returned
+                if df_temp.shape[0] == 1:
+                    # Create IRIs
+                    county_iri = _PREFIX['kwgr'][county.replace(KWG_RESOURCE, '')]
+                    state_iri = _PREFIX['kwgr'][df_temp['within'].iloc[0].replace(KWG_RESOURCE, '')]
+                    geom_iri = _PREFIX['kwgr'][df_temp['geom'].iloc[0].replace(KWG_RESOURCE, '')]
+
+                    # Create triples
+                    kg.add((county_iri, RDF.type, _PREFIX['kwg-ont']['AdministrativeRegion_2']))
+                    kg.add((county_iri, OWL.sameAs, _PREFIX['dcgeoid'][df_temp['fips'].iloc[0]]))
+                    kg.add((county_iri, RDFS.label, Literal(df_temp['label'].iloc[0], datatype=XSD.string)))
+                    kg.add((county_iri, _PREFIX['kwg-ont']['administrativePartOf'], state_iri))
+                    kg.add((county_iri, _PREFIX['kwg-ont']['hasFIPS'],
+                            Literal(df_temp['fips'].iloc[0], datatype=XSD.string)))
+                    kg.add((county_iri, GEO.defaultGeometry, geom_iri))
+                    kg.add((county_iri, GEO.hasGeometry, geom_iri))
+                    kg.add((geom_iri, RDF.type, GEO.Geometry))
+                    kg.add((geom_iri, RDFS.label, Literal(df_temp['geom_label'].iloc[0], datatype=XSD.string)))
+                    kg.add((geom_iri, GEO.asWKT, Literal(df_temp['wkt'].iloc[0], datatype=GEO.wktLiteral)))
+                # Alert the user if other than 1 county was returned
+                else:
+                    print(f"County query for {county} returned {df_temp.shape[0]} rows; expected 1")
+            # Build an output file name from a path, a fips code, an abbreviation, and a template
+            state_fips = df_county["state_fips"].iloc[0]
+            state_abbr = df_county["StateAbbr"].iloc[0]
+            output_file = outpath + state_abbr.lower() + '_' + state_fips + '_admin-regions_level-2.ttl'
+            kg.serialize(output_file, format='turtle')  # Write the completed KG to a .ttl file
+        # Alert the user if a territory is skipped
+        else:
+            logger.info(f"   Skipped counties for {df_county['state_label'].iloc[0]}")
+            print(f"Skipped counties for {df_county['state_label'].iloc[0]}")
+
+
+def get_input_file_name(fips: str) -> str:
+    """Given a state's FIPS code, returns a path / filename for the input file (user specific)
+
+    :param fips: A state's 2-digit FIPS code (as a string) (e.g., '01')
+    :return: The path / filename for an input shape file for a specific state
+    """
+    return '../Geospatial/CountySubdivisionShpFiles/tl_2023_' + fips + '_cousub/tl_2023_' + fips + '_cousub.shp'
+
+
+def get_output_file_name(abbr: str, fips: str) -> str:
+    """Given a state's abbreviation and FIPS code, returns a path / filename for the output file (user specific)
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :return: The path / filename for an output .ttl file for a specific state
+    """
+    return LEVEL3_OUTPATH + abbr.lower() + '_' + fips + '_admin-regions_level-3.ttl'
+
+
+def get_s2_file_name(abbr: str, fips: str) -> str:
+    """Given a state's abbreviation and FIPS code, returns the path / filename of the state's Level 13 S2 cell file
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :return: The path / filename of the S2 cell .ttl file written by state_s2_cells_2ttl()
+    """
+    return S2_OUTPATH + abbr.lower() + '_' + fips + '_s2-l13.ttl'
+
+
+def get_s2_output_file_name(abbr: str, fips: str) -> str:
+    """Given a state's abbreviation and FIPS code, returns a path / filename for the S2 integration output file
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :return: The path / filename for an output .ttl file of the S2 integration for a specific state
+    """
+    return LEVEL3_OUTPATH + 's2_' + abbr.lower() + '_' + fips + '_admin-regions_level-3.ttl'
+
+
+def get_part_of_closure_file_name(abbr: str, fips: str) -> str:
+    """Given a state's abbreviation and FIPS code, returns a path / filename for the administrativePartOf closure file
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :return: The path / filename for an output .ttl file of the indirect administrativePartOf relations of a state
+    """
+    return LEVEL3_OUTPATH + abbr.lower() + '_' + fips + '_admin-regions_part-of-closure.ttl'
+
+
+def build_iris(gid: str, _PREFIX: dict) -> tuple:
+    """Create IRIs for a town and its geometry
+
+    :param gid: The 10-digit FIPS code for the town is expected as input as a string (GEOID)
+    :param _PREFIX: a dictionary of project namespaces
+    :return: a tuple with the two IRIs
+    """
+    return _PREFIX["dcgeoid"][gid], _PREFIX["saw_geo"]['d.Polygon.administrativeRegion.USA.' + gid]
+
+
+def county_subs_2ttl(state: str, infile: str, outfile: str, df: pd.DataFrame = None) -> None:
+    """Parse all county subdivisions within a state to an RDFLib knowledge graph
+
+    :param state: The name of the current state
+    :param infile: A string with the path / filename for a Cenusus Bureau .shp file of county subdivisions for a state
+    :param outfile: A string with the path / filename for a .ttl file
+    :param df: A DataFrame containing 5-digit county FIPS codes and county names (defaults to the FIPS table)
+    :return: None
+    """
+    _PREFIX = get_prefixes()
+    if df is None:
+        df = read_fips_table()[["CountyFIPS", "CountyName"]].drop_duplicates()
+    cousub_affix = ', ' + state
+    gdf_towns = gpd.read_file(infile)  # Read the .shp file to a GeoDataframe
+    logger.info('Intialize RDFLib Graph')
+    graph = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+    count = 1  # For providing progress updates to the user via the terminal
+    n = len(gdf_towns.index)  # For providing progress updates to the user via the terminal
+    logger.info(f'Triplify county subdivisions (AdministrativeRegion_3) for {state} from {infile}')
+    for row in gdf_towns.itertuples():
+        county = df.loc[df["CountyFIPS"] == str(row.STATEFP) + str(row.COUNTYFP), "CountyName"].values[0]
+        if state in ['Alaska', 'Connecticut', 'District of Columbia', 'Louisiana']:
+            name = row.NAMELSAD + ', ' + county + cousub_affix  # Creates a string of the form 'CountySub, County, State'
+            # Alaska has Boroughs and Census Areas
+            # Connecticut has Planning Regions
+            # DC is a single unit
+            # Louisiana has Parishes
+        else:
+            name = row.NAMELSAD + ', ' + county + ' County' + cousub_affix  # Creates a string of the form 'CountySub, County, State'
+        # Get IRIs for the current county subdivision and its polygon geometry
+        cousub_iri, geo_iri = build_iris(row.GEOID, _PREFIX)
+
+        # Triplify basic county subdivision data
+        graph.add((cousub_iri, RDF.type, _PREFIX["kwg-ont"]['AdministrativeRegion_3']))
+        graph.add((cousub_iri, RDFS.label, Literal(name, datatype=XSD.string)))
+        graph.add((cousub_iri, _PREFIX["kwg-ont"]['administrativePartOf'],
+                   _PREFIX["kwgr"]['administrativeRegion.USA.' + row.STATEFP + row.COUNTYFP]))
+        graph.add((cousub_iri, _PREFIX["kwg-ont"]['hasFIPS'], Literal(row.GEOID, datatype=XSD.string)))
+
+        # Triplify county subdivision geometry data
+        graph.add((cousub_iri, GEO.hasGeometry, geo_iri))
+        graph.add((cousub_iri, GEO.defaultGeometry, geo_iri))
+        graph.add((geo_iri, RDF.type, GEO.Geometry))
+        graph.add((geo_iri, GEO.asWKT, Literal(row.geometry, datatype=GEO.wktLiteral)))
+        graph.add((geo_iri, RDFS.label, Literal('Geometry of ' + name, datatype=XSD.string)))
+
+        # Provide user progress update
+        print(f'Row {count:3} of {n} : {name:50}', end='\r', flush=True)
+        count += 1
+    print()
+    logger.info(f'Write {state} county subdivision triples to {outfile}')
+    graph.serialize(outfile, format='turtle')  # Write the current state KG to a .ttl file
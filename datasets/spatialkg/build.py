@@ -0,0 +1,200 @@
+"""Build the .ttl files for many states with one command, running each stage as soon as its inputs are ready
+
+The stages of a state (see spatialkg.worker.STAGES) depend on each other's files: the states file (level 1)
+feeds the counties (level 2); the counties and county subdivisions (level 3) feed the administrative region
+class statements and the part-of closure; the S2 cell file feeds the S2 class statements and the county
+subdivision S2 integration; and so on (see INPUTS). The build models every (stage, state) pair as a task in a
+dependency graph and runs all tasks whose inputs are ready at the same time:
+    * network-bound stages (KWG queries) run in a thread pool
+    * CPU-bound stages (shapefiles, spatial joins, and reading / writing large .ttl files) run in a process pool
+A task starts as soon as the last of its inputs is written, so the nationwide build takes about as long as its
+longest chain of stages rather than the sum of all stages. If a task fails, the tasks that depend on it are
+skipped and the rest of the build continues.
+
+Stages that are not part of a build are assumed to be up to date (their files are used as they are).
+
+Under ### States ###, define
+    the list of the states' proper names to build (or None for all states in the FIPS table)
+Under ### Build ###, define
+    the list of stages to run (or None for BUILD_STAGES)
+    the number of threads for network-bound stages and the number of processes for CPU-bound stages
+
+Run as a module from this folder (the datasets folder): python -m spatialkg.build
+
+Required:
+    * spatialkg (geopandas, pandas, rdflib, requests, numpy, and shapely)
+    * namespaces (a local .py file with a dictionary of project namespaces)
+    * concurrent.futures, datetime, logging, multiprocessing, os, time
+
+Functions:
+    * build_tasks - returns the tasks of a build and the tasks each of them depends on
+    * run_build - runs the tasks of a build concurrently in dependency order
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+import datetime
+import logging
+import multiprocessing
+import os
+import time
+
+from .config import FIPS_TABLE
+from .worker import DEFAULT_STAGES, STAGES
+
+### States ###
+states = None
+### Build ###
+stages = None
+threads = 8
+processes = os.cpu_count()
+
+logname = 'logs/log_spatialkg_build.txt'
+
+# The stage that builds the (national) states file; every other stage is run per state
+NATIONAL_STAGES = ['states']
+
+# Stages in a build when none are listed
+BUILD_STAGES = ['states', 'counties'] + DEFAULT_STAGES
+
+# Stage -> the stages whose files it reads (for the same state, or the national states file)
+INPUTS = {
+    'states': [],
+    'counties': ['states'],
+    's2_cells': [],
+    'county_s2_integration': [],
+    'state_s2_integration': ['states', 'counties', 's2_cells', 'county_s2_integration'],
+    'state_s2_integration_kwg': [],
+    's2_class_statements': ['s2_cells'],
+    'county_subdivisions': [],
+    'county_subdivision_s2_integration': ['s2_cells'],
+    'part_of_closure': ['states', 'counties', 'county_subdivisions'],
+    'admin_class_statements': ['counties', 'county_subdivisions'],
+    'partition_s2_outputs': ['s2_cells', 'county_s2_integration', 'state_s2_integration', 'state_s2_integration_kwg',
+                             'county_subdivision_s2_integration'],
+}
+
+# Stages that spend their time waiting on KWG (run in threads); all other stages run in processes
+NETWORK_STAGES = {'states', 'counties', 's2_cells', 'county_s2_integration', 'state_s2_integration_kwg'}
+
+logger = logging.getLogger(__name__)
+
+
+def build_tasks(names: list, build_stages: list) -> dict:
+    """Returns the tasks of a build and the tasks each of them depends on
+
+    A task is a (stage, state name) pair; the state name of a national stage is None. Inputs from stages that are
+    not part of the build are dropped (their files are assumed to be up to date).
+
+    :param names: a list of states' proper names (e.g., ['Alabama', 'Maine'])
+    :param build_stages: the names of the stages to run (see spatialkg.worker.STAGES)
+    :return: a dictionary of task -> set of tasks it depends on
+    """
+    unknown = [stage for stage in build_stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f'Unknown stage(s): {unknown}')
+    tasks = {}
+    for stage in build_stages:
+        for name in [None] if stage in NATIONAL_STAGES else names:
+            tasks[(stage, name)] = {(inp, None if inp in NATIONAL_STAGES else name)
+                                    for inp in INPUTS[stage] if inp in build_stages}
+    return tasks
+
+
+def _run_task(stage: str, name: str, table: str) -> float:
+    """Runs a stage for a state (in a worker thread or process) and returns its runtime in seconds"""
+    start_time = time.time()
+    logger.info(f'Stage {stage} for {name or "all states"}')
+    STAGES[stage](name, table)
+    return round(time.time() - start_time, 3)
+
+
+def _init_process(log_file: str) -> None:
+    """Sets up logging in a worker process"""
+    if log_file:
+        from .config import setup_logging
+        setup_logging(log_file)
+
+
+def run_build(names: list, build_stages: list = None, table: str = FIPS_TABLE, n_threads: int = 8,
+              n_processes: int = None, log_file: str = None) -> dict:
+    """Runs the tasks of a build concurrently, each as soon as the tasks it depends on are done
+
+    :param names: a list of states' proper names (e.g., ['Alabama', 'Maine'])
+    :param build_stages: the names of the stages to run; defaults to BUILD_STAGES
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :param n_threads: the number of threads for network-bound stages
+    :param n_processes: the number of processes for CPU-bound stages (defaults to the number of CPUs)
+    :param log_file: path/filename of the log file for the worker processes (None to not log in them)
+    :return: a dictionary of task -> {'status': 'done' | 'failed' | 'skipped', 'runtime' or 'error'}
+    """
+    tasks = build_tasks(names, build_stages or BUILD_STAGES)
+    dependents = {task: [] for task in tasks}
+    for task, inputs in tasks.items():
+        for inp in inputs:
+            dependents[inp].append(task)
+    waiting = {task: len(inputs) for task, inputs in tasks.items()}
+    results = {}
+    running = {}  # future -> task
+
+    # Spawned (not forked) processes, so that a fork cannot copy a lock held by one of the threads
+    with ThreadPoolExecutor(n_threads) as thread_pool, \
+            ProcessPoolExecutor(n_processes, mp_context=multiprocessing.get_context('spawn'),
+                                initializer=_init_process, initargs=(log_file,)) as process_pool:
+
+        def submit(task):
+            pool = thread_pool if task[0] in NETWORK_STAGES else process_pool
+            running[pool.submit(_run_task, task[0], task[1], table)] = task
+
+        def skip(task, failed):
+            # Skip a task (and everything downstream of it) because one of its inputs failed
+            if task in results:
+                return
+            results[task] = {'status': 'skipped', 'error': f'{failed[0]} for {failed[1] or "all states"} failed'}
+            for dependent in dependents[task]:
+                skip(dependent, failed)
+
+        for task, count in waiting.items():
+            if count == 0:
+                submit(task)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    results[task] = {'status': 'done', 'runtime': future.result()}
+                except Exception as e:
+                    logger.error(f'Stage {task[0]} for {task[1] or "all states"} failed: {e!r}')
+                    results[task] = {'status': 'failed', 'error': repr(e)}
+                    for dependent in dependents[task]:
+                        skip(dependent, task)
+                    continue
+                for dependent in dependents[task]:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0 and dependent not in results:
+                        submit(dependent)
+    return results
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+    from .fips import read_fips_table
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging(logname)
+    start_time = time.time()
+    if states is None:
+        # All states (and DC) in the FIPS table; territories have FIPS codes of 60 and above
+        df_states = read_fips_table(FIPS_TABLE)[['StateName', 'StateFIPS']].drop_duplicates()
+        states = df_states.loc[df_states['StateFIPS'].astype(int) < 60, 'StateName'].tolist()
+    logger.info(f'Launching build: {len(states)} states, stages = {stages or BUILD_STAGES}')
+    build_results = run_build(states, stages, FIPS_TABLE, threads, processes, logname)
+    for status in ['done', 'failed', 'skipped']:
+        tasks_with_status = [task for task, result in build_results.items() if result['status'] == status]
+        print(f'{len(tasks_with_status)} tasks {status}')
+        for stage, name in tasks_with_status if status != 'done' else []:
+            print(f"   {stage} for {name or 'all states'}: {build_results[(stage, name)]['error']}")
+    stage_time = sum(result.get('runtime', 0) for result in build_results.values())
+    print(f'Sum of stage runtimes: {str(datetime.timedelta(seconds=stage_time))} HMS')
+    logger.info(f'Build: {build_results}')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
@@ -0,0 +1,82 @@
+"""Write .ttl files of just the rdf:type (class) statements for a state's S2 cells and administrative regions
+
+The class statements are copied line by line from the state's S2 cell and administrative region .ttl files
+(no graph is loaded), with the trailing ';' of each statement replaced by '.'.
+
+Functions:
+    * state_s2_cell_class_stmts_2ttl - Extracts only the S2 cell class statements from a state's S2 cell info
+    * state_admin_region_class_stmts_2ttl - Extracts only the administrative region class statements (levels 1-3)
+                                            for a state
+"""
+from .config import CLASS_STMTS_OUTPATH, LEVEL1_OUTFILE, LEVEL2_OUTPATH, LEVEL3_OUTPATH, S2_OUTPATH
+from .fips import get_state_abbr, get_state_fips
+
+# rdf prefixes needed for the S2 cell class statements
+S2_PREFIXES = ['@prefix kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/> .',
+               '@prefix kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/> .',
+               '@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .']
+
+# rdf prefixes needed for the AdminRegion class statements (levels 1-3)
+ADMIN_PREFIXES = ['@prefix dcgeoid: <https://datacommons.org/browser/geoId/> .',
+                  '@prefix kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/> .',
+                  '@prefix kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/> .',
+                  '@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .']
+
+
+def state_s2_cell_class_stmts_2ttl(name: str, table: str) -> None:
+    """Given a state's proper name and a State-County-FIPS data table,
+          writes only the S2 cell class statements for the state to a .ttl file
+
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    abbr = get_state_abbr(table, name).lower()
+    fips = get_state_fips(table, name)
+    input = S2_OUTPATH + abbr + '_' + fips + '_s2-l13.ttl'
+    output = CLASS_STMTS_OUTPATH + abbr + '_' + fips + '_s2-l13_class-statements.ttl'
+    # Create the output .ttl file
+    with open(output, 'w') as outfile:
+        # Add the prefixes to the output file
+        for prefix in S2_PREFIXES:
+            outfile.write(prefix)
+            outfile.write('\n')
+        outfile.write('\n')
+        with open(input, 'r') as infile:
+            for line in infile:
+                # Finds the class statements for S2Cell_Level13
+                if 's2cell_level13' in line.lower():
+                    outfile.write(line.replace(';', '.'))  # Making sure syntax is correct
+
+
+def state_admin_region_class_stmts_2ttl(state_abbr: str, state_fips: str) -> None:
+    """Given a state's two-letter abbreviation and 2-digit FIPS code,
+          writes only the administrative region class statements (levels 1-3) for the state to a .ttl file
+
+    :param state_abbr: the state's two-letter abbreviation in lower case (e.g., 'al')
+    :param state_fips: the state's 2-digit FIPS code as a string (e.g., '01')
+    :return: None
+    """
+    state_iri = 'kwgr:administrativeRegion.USA.' + state_fips
+    input1 = LEVEL1_OUTFILE
+    input2 = LEVEL2_OUTPATH + state_abbr + '_' + state_fips + '_admin-regions_level-2.ttl'
+    input3 = LEVEL3_OUTPATH + state_abbr + '_' + state_fips + '_admin-regions_level-3.ttl'
+    output = CLASS_STMTS_OUTPATH + state_abbr + '_' + state_fips + '_admin-region_class-statements.ttl'
+    # Create the output .ttl file
+    with open(output, 'w') as outfile:
+        # Add the prefixes to the output file
+        for prefix in ADMIN_PREFIXES:
+            outfile.write(prefix)
+            outfile.write('\n')
+        outfile.write('\n')
+        with open(input1, 'r') as infile:
+            for line in infile:
+                # Finds the class statement for AdministrativeRegion_1
+                if state_iri in line:
+                    outfile.write(line.replace(';', '.'))  # Making sure syntax is correct
+        for input in [input2, input3]:
+            with open(input, 'r') as infile:
+                for line in infile:
+                    # Finds the class statements for AdministrativeRegion_2 and AdministrativeRegion_3
+                    if 'administrativeregion_' in line.lower():
+                        outfile.write(line.replace(';', '.'))  # Making sure syntax is correct
@@ -0,0 +1,63 @@
+"""Settings shared by the dataset scripts and the spatialkg package
+
+Nothing in this module runs at import time; the scripts (and the worker) call the setup functions explicitly.
+
+Functions:
+    * setup_logging - configures file logging the same way for every script
+    * set_working_directory - changes to the folder that holds the input tables and the ttl_files/ output folders
+"""
+import logging
+import os
+
+# Folder that holds namespaces.py (the project namespaces) and the Spatial working directory
+DATA_SOURCES_DIR = os.environ.get('SAWGRAPH_DATA_SOURCES', 'G:/My Drive/Laptop/SAWGraph/Data Sources')
+SPATIAL_DIR = os.environ.get('SAWGRAPH_SPATIAL_DIR', DATA_SOURCES_DIR + '/Spatial')
+
+# KnowWhereGraph (KWG) SPARQL endpoint
+KWG_ENDPOINT = 'https://stko-kwg.geog.ucsb.edu/graphdb/repositories/KWG'
+KWG_RESOURCE = 'http://stko-kwg.geog.ucsb.edu/lod/resource/'
+# TLS certificate verification for KWG queries (requests' verify): a CA bundle path, 'false' to skip verification,
+#    or unset to use the CA bundle that comes with requests
+_kwg_verify = os.environ.get('SAWGRAPH_KWG_VERIFY', '')
+KWG_VERIFY = False if _kwg_verify.lower() == 'false' else (_kwg_verify or True)
+
+# SPARQL 1.1 Graph Store Protocol endpoint of the Spatial repository and the base IRI of the per-state named graphs
+STORE_ENDPOINT = os.environ.get('SAWGRAPH_STORE_ENDPOINT', 'http://localhost:7200/repositories/Spatial/rdf-graphs/service')
+GRAPH_BASE = os.environ.get('SAWGRAPH_GRAPH_BASE', 'http://purl.org/spatialai/spatial/graph/')
+
+# State-County-FIPS table; columns: StateFIPS, CountyFIPS_3, CountyName, StateName, CountyFIPS, StateAbbr, STATE-COUNTY
+FIPS_TABLE = 'fips2county.tsv'
+
+# Output paths (relative to SPATIAL_DIR)
+LEVEL1_OUTPATH = 'ttl_files/AdministrativeRegion_1/'
+LEVEL1_OUTFILE = LEVEL1_OUTPATH + 'us_admin-regions_level-1.ttl'
+LEVEL2_OUTPATH = 'ttl_files/AdministrativeRegion_2/'
+LEVEL3_OUTPATH = 'ttl_files/AdministrativeRegion_3/'
+S2_OUTPATH = 'ttl_files/S2_cells/'
+CLASS_STMTS_OUTPATH = 'ttl_files/class_statements/'
+
+
+def setup_logging(logname: str) -> logging.Logger:
+    """Configures the root logger to append to a log file and returns the logger of the calling script
+
+    :param logname: path/filename of the log file (e.g., 'logs/log_AdminRegionLevel3-2ttl.txt')
+    :return: the '__main__' logger
+    """
+    logging.basicConfig(filename=logname,
+                        filemode='a',
+                        format='%(asctime)s %(levelname)-8s %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S',
+                        level=logging.INFO)
+    logger = logging.getLogger('__main__')
+    logger.info('')
+    logger.info('LOGGER INITIALIZED')
+    return logger
+
+
+def set_working_directory(path: str = None) -> None:
+    """Changes the current directory to the Spatial folder (input tables and ttl_files/ output folders)
+
+    :param path: the folder to change to; defaults to SPATIAL_DIR
+    :return: None
+    """
+    os.chdir(path or SPATIAL_DIR)
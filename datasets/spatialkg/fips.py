@@ -0,0 +1,82 @@
+"""State-County-FIPS table lookups
+
+The table is read once per path and cached, so repeated lookups (and a long-running worker) do not re-read it.
+
+Functions:
+    * read_fips_table - reads (and caches) a .tsv table of State-County-FIPS info
+    * get_state_fips - Takes a state name (e.g., 'Alabama') and returns its FIPS code (e.g., '01') as a string
+    * get_state_abbr - Takes a state name (e.g., 'Alabama') and returns its abbreviation (e.g., 'AL')
+    * get_state_identifiers - Takes a state name and returns its abbreviation (lower case), FIPS code, KWG IRI,
+                              and RDFLib IRI
+    * add_state_abbrev - Adds two-letter state abbreviations to a dataframe based on state FIPS codes
+"""
+from functools import lru_cache
+
+import pandas as pd
+
+from .config import FIPS_TABLE
+from .namespaces import get_prefixes
+
+
+@lru_cache(maxsize=None)
+def read_fips_table(table: str = FIPS_TABLE) -> pd.DataFrame:
+    """Reads a .tsv table of State-County-FIPS info (cached; treat the result as read-only)
+
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: a DataFrame with all columns as strings
+    """
+    return pd.read_csv(table, sep='\t', header='infer', dtype=str, encoding='latin-1')
+
+
+def get_state_fips(table: str, state_name: str) -> str:
+    """Takes a state's proper name and returns the state's 2-digit FIPS code as a string
+
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :param state_name: a string of a state's proper name (e.g., 'Alabama')
+    :return: a 2-digit state FIPS code as a string (e.g., '01')
+    """
+    df_fips = read_fips_table(table)
+    state_fips_df = df_fips[["StateName", "StateFIPS"]].drop_duplicates()
+    return str(state_fips_df.loc[state_fips_df["StateName"] == state_name, "StateFIPS"].values[0]).zfill(2)
+
+
+def get_state_abbr(table: str, state_name: str) -> str:
+    """Takes a state's proper name and returns the state's two-letter abbreviation
+
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :param state_name: a string of a state's proper name (e.g., 'Alabama')
+    :return: a two-letter state abbreviation (e.g., 'AL')
+    """
+    df_fips = read_fips_table(table)
+    state_abbr_df = df_fips[["StateName", "StateAbbr"]].drop_duplicates()
+    return state_abbr_df.loc[state_abbr_df["StateName"] == state_name, "StateAbbr"].values[0]
+
+
+def get_state_identifiers(table: str, name: str) -> tuple:
+    """Given a state's proper name and a table of State-County-FIPS info, returns
+          the state's two-letter abbreviation, 2-digit FIPS code (as a string),
+          KnowWhereGraph IRI, and RDFLib version of the IRI
+
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :return: two-letter abbreviation, 2-digit FIPS code, KWG IRI, RDFLib IRI object
+    """
+    abbr = get_state_abbr(table, name).lower()
+    fips = get_state_fips(table, name)
+    query_iri = 'kwgr:administrativeRegion.USA.' + fips
+    rdflib_iri = get_prefixes()['kwgr']['administrativeRegion.USA.' + fips]
+    return abbr, fips, query_iri, rdflib_iri
+
+
+def add_state_abbrev(df: pd.DataFrame, table: str = FIPS_TABLE) -> pd.DataFrame:
+    """Takes a dataframe of state data from a query of KWG and adds a colum of two-letter state abbreviations
+
+    :param df: a dataframe of US state info from a KWG query that includes a state_fips column
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: the original dataframe with an extra column of two-letter state abbreviations
+    """
+    df_fips = read_fips_table(table)
+    state_abbr_df = df_fips[["StateFIPS", "StateAbbr"]].drop_duplicates()
+    df = df.merge(state_abbr_df, how='left', left_on="state_fips", right_on="StateFIPS")
+    df = df.drop(columns=["StateFIPS"])
+    return df
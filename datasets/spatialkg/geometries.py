@@ -0,0 +1,137 @@
+"""Extract the features and geometries of generated .ttl files into a GeoDataFrame / GeoParquet file
+
+Loading an output file into RDFLib (and then rdfpandas) just to look at its geometries takes minutes for a
+state's S2 cells. The extractor reads files one statement at a time (spatialkg.turtle) and keeps only the
+triples it needs: feature -> geo:defaultGeometry -> geo:asWKT and the feature's rdf:type, rdfs:label,
+kwg-ont:hasFIPS, and kwg-ont:cellID. It works for any of the S2 cell, county, and county subdivision outputs
+(and .nt files); the WKT is parsed with shapely in one vectorized call.
+
+Under ### Input Files ###, define
+    the list of paths/filenames of the .ttl files to extract
+Under ### Output ###, define
+    the path/filename for the output GeoParquet file
+
+Required:
+    * geopandas (and pyarrow to write GeoParquet)
+    * pandas
+    * shapely
+    * datetime, logging, os, re, time
+
+Functions:
+    * read_features - reads the features of .ttl files with their geometry IRIs, WKT, and key attributes
+    * features_dataframe - returns the features of .ttl files as a GeoDataFrame
+    * features_2parquet - writes the features of .ttl files to a GeoParquet file
+"""
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+import datetime
+import logging
+import os
+import re
+import time
+
+from .terms import KWG_ONT
+from .turtle import RDF_TYPE, read_triples
+
+### Input Files ###
+ttl_files = ['ttl_files/AdministrativeRegion_3/me_23_admin-regions_level-3.ttl']
+
+### Output ###
+parquet_file = 'geoparquet/me_23_admin-regions_level-3.parquet'
+
+GEO = 'http://www.opengis.net/ont/geosparql#'
+DEFAULT_GEOMETRY = GEO + 'defaultGeometry'
+AS_WKT = GEO + 'asWKT'
+LABEL = 'http://www.w3.org/2000/01/rdf-schema#label'
+HAS_FIPS = KWG_ONT + 'hasFIPS'
+CELL_ID = KWG_ONT + 'cellID'
+_CRS = re.compile(r'^\s*<[^>]*>\s*')
+
+# Feature predicate -> column
+ATTRIBUTES = {RDF_TYPE: 'type', LABEL: 'label', HAS_FIPS: 'fips', CELL_ID: 'cell_id'}
+COLUMNS = ['feature', 'geometry_iri', 'type', 'label', 'fips', 'cell_id', 'wkt']
+
+logger = logging.getLogger(__name__)
+
+
+def read_features(infiles: list) -> pd.DataFrame:
+    """Reads the features of .ttl / .nt files with their default geometry, WKT, and key attributes
+
+    A feature is a subject with a geo:defaultGeometry; the geometry's geo:asWKT may be in any of the files. For
+    predicates with several values (e.g., rdf:type), the first value read is kept.
+
+    :param infiles: path/filename(s) of the .ttl or .nt files (read together)
+    :return: a DataFrame with the columns feature, geometry_iri, type, label, fips, cell_id (UInt64), and wkt
+             (None / missing where a file has no such triple)
+    """
+    infiles = [infiles] if isinstance(infiles, (str, os.PathLike)) else list(infiles)
+    geometries = {}  # feature -> geometry IRI
+    attributes = {column: {} for column in ATTRIBUTES.values()}  # column -> {subject -> value}
+    wkts = {}  # geometry IRI -> WKT
+    for infile in infiles:
+        n_triples = 0
+        for s, p, o in read_triples(infile):
+            n_triples += 1
+            if p == DEFAULT_GEOMETRY:
+                geometries.setdefault(s, o)
+            elif p == AS_WKT:
+                wkts[s] = o[0] if isinstance(o, tuple) else o
+            elif p in ATTRIBUTES:
+                attributes[ATTRIBUTES[p]].setdefault(s, o[0] if isinstance(o, tuple) else o)
+        logger.info(f'{infile}: {n_triples} triples read')
+
+    features = list(geometries)
+    df = pd.DataFrame({'feature': features, 'geometry_iri': [geometries[f] for f in features]})
+    for column, values in attributes.items():
+        df[column] = [values.get(f) for f in features]
+    df['cell_id'] = pd.array([None if c is None else int(c) for c in df['cell_id']], dtype='UInt64')
+    df['wkt'] = [wkts.get(g) for g in df['geometry_iri']]
+    return df[COLUMNS]
+
+
+def features_dataframe(infiles: list, crs: str = 'EPSG:4326') -> gpd.GeoDataFrame:
+    """Returns the features of .ttl / .nt files and their default geometries as a GeoDataFrame
+
+    :param infiles: path/filename(s) of the .ttl or .nt files (read together)
+    :param crs: the coordinate reference system of the WKT literals (an optional CRS IRI prefix is removed)
+    :return: a GeoDataFrame with the columns of read_features (without wkt) and a geometry column; features
+             whose WKT is missing or does not parse have an empty (None) geometry
+    """
+    df = read_features(infiles)
+    wkt = [None if w is None else _CRS.sub('', w) for w in df.pop('wkt')]
+    geometry = shapely.from_wkt(wkt, on_invalid='ignore')
+    n_missing = int(shapely.is_missing(geometry).sum())
+    if n_missing:
+        logger.warning(f'{n_missing} of {len(df)} features have no (valid) geo:asWKT')
+    return gpd.GeoDataFrame(df, geometry=geometry, crs=crs)
+
+
+def features_2parquet(infiles: list, outfile: str, crs: str = 'EPSG:4326') -> int:
+    """Writes the features of .ttl / .nt files and their default geometries to a GeoParquet file
+
+    :param infiles: path/filename(s) of the .ttl or .nt files (read together)
+    :param outfile: path/filename for the output .parquet file
+    :param crs: the coordinate reference system of the WKT literals
+    :return: the number of features written
+    """
+    gdf = features_dataframe(infiles, crs)
+    gdf.to_parquet(outfile)
+    logger.info(f'Wrote {len(gdf)} features to {outfile}')
+    return len(gdf)
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_geometries.txt')
+    start_time = time.time()
+    logger.info(f'Launching script: {ttl_files} -> {parquet_file}')
+    os.makedirs(os.path.dirname(parquet_file) or '.', exist_ok=True)
+    n_features = features_2parquet(ttl_files, parquet_file)
+    print(f'{n_features} features written to {parquet_file}')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
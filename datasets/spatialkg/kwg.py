@@ -0,0 +1,100 @@
+"""Query KnowWhereGraph (or any SPARQL endpoint) and return the results as typed DataFrames
+
+One HTTP session (connection pool) is kept per endpoint and reused by every query, so a long-running worker does
+not pay for a new TLS connection per query.
+
+Results are requested as SPARQL CSV (text/csv) rather than JSON and parsed with pandas' C parser, so no Python
+object is created per binding. Columns are typed as they are parsed:
+    * IRIs that repeat on many rows (e.g., ?county in a state-wide query) can be read as categoricals, so each
+      distinct IRI is stored once
+    * cell IDs are read as uint64 (the C parser is used because the pyarrow parser reads large integers through
+      float64 and corrupts cell IDs above 2**53)
+    * every other column is read as strings, as before (unbound variables are NaN)
+Large results can be read in batches of rows (kwg_batches) while the response is still being received.
+
+Required:
+    * pandas
+    * requests
+
+Functions:
+    * get_session - returns the cached HTTP session for an endpoint
+    * kwg_dataframe - executes a SELECT query and returns the results as a DataFrame
+    * kwg_batches - executes a SELECT query and yields the results as DataFrames of at most batch_rows rows
+"""
+import pandas as pd
+
+from collections import defaultdict
+import logging
+
+# The number of result rows per DataFrame yielded by kwg_batches
+BATCH_ROWS = 100000
+
+logger = logging.getLogger(__name__)
+
+_sessions = {}
+
+
+def get_session(endpoint: str):
+    """Returns the HTTP session used for an endpoint, creating it on first use
+
+    :param endpoint: a SPARQL endpoint URL
+    :return: a requests.Session
+    """
+    if endpoint not in _sessions:
+        import requests
+        from .config import KWG_VERIFY
+        session = requests.Session()
+        session.verify = KWG_VERIFY  # see config.py (SAWGRAPH_KWG_VERIFY)
+        _sessions[endpoint] = session
+    return _sessions[endpoint]
+
+
+def _get_csv(endpoint: str, query: str):
+    """Executes a SELECT query and returns the (streamed) CSV response body as a file-like object"""
+    response = get_session(endpoint).get(endpoint, params={'query': query}, headers={'Accept': 'text/csv'},
+                                         stream=True)
+    response.raise_for_status()
+    response.raw.decode_content = True  # Undo any gzip / deflate transfer encoding
+    return response.raw
+
+
+def _read_options(categories: list, cell_ids: list) -> dict:
+    """Returns the pandas.read_csv options for a SPARQL CSV result"""
+    dtypes = defaultdict(lambda: str)
+    dtypes.update({column: 'category' for column in categories or []})
+    dtypes.update({column: 'uint64' for column in cell_ids or []})
+    # Only empty fields (unbound variables) are missing; labels such as 'NA' or 'null' are kept
+    return {'dtype': dtypes, 'keep_default_na': False, 'na_values': [''], 'engine': 'c'}
+
+
+def kwg_dataframe(endpoint: str, query: str, categories: list = None, cell_ids: list = None) -> pd.DataFrame:
+    """Executes a SPARQL SELECT query and returns the results as a DataFrame
+
+    :param endpoint: a SPARQL endpoint URL (e.g., the KWG endpoint)
+    :param query: a SPARQL SELECT query
+    :param categories: names of the variables to read as categoricals (IRIs that repeat on many rows)
+    :param cell_ids: names of the variables to read as uint64 (S2 cell IDs)
+    :return: a DataFrame with one column per query variable (strings unless listed in categories or cell_ids)
+    """
+    return pd.read_csv(_get_csv(endpoint, query), **_read_options(categories, cell_ids))
+
+
+def kwg_batches(endpoint: str, query: str, categories: list = None, cell_ids: list = None,
+                batch_rows: int = BATCH_ROWS):
+    """Executes a SPARQL SELECT query and yields the results in batches of rows as they are received
+
+    The categories of a categorical column are those of its batch.
+
+    :param endpoint: a SPARQL endpoint URL (e.g., the KWG endpoint)
+    :param query: a SPARQL SELECT query
+    :param categories: names of the variables to read as categoricals (IRIs that repeat on many rows)
+    :param cell_ids: names of the variables to read as uint64 (S2 cell IDs)
+    :param batch_rows: the maximum number of rows per DataFrame
+    :return: a generator of DataFrames with one column per query variable
+    """
+    n_rows = 0
+    with pd.read_csv(_get_csv(endpoint, query), chunksize=batch_rows, **_read_options(categories, cell_ids)) as reader:
+        for batch in reader:
+            n_rows += len(batch)
+            yield batch
+    logger.info(f'{n_rows} rows read from {endpoint}')
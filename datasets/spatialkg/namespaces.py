@@ -0,0 +1,27 @@
+"""Load the project namespaces (_PREFIX) from the local namespaces.py file
+
+The namespaces are kept outside of this repository in namespaces.py in the Data Sources folder. The file is
+loaded by path on first use (instead of adding the folder to sys.path at import time) and cached.
+
+Functions:
+    * get_prefixes - returns the dictionary of project namespaces
+"""
+from functools import lru_cache
+import importlib.util
+import os
+
+from .config import DATA_SOURCES_DIR
+
+
+@lru_cache(maxsize=None)
+def get_prefixes(folder: str = None) -> dict:
+    """Returns the dictionary of project namespaces (_PREFIX) defined in namespaces.py
+
+    :param folder: the folder containing namespaces.py; defaults to config.DATA_SOURCES_DIR
+    :return: a dictionary of prefix -> RDFLib Namespace
+    """
+    path = os.path.join(folder or DATA_SOURCES_DIR, 'namespaces.py')
+    spec = importlib.util.spec_from_file_location('namespaces', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module._PREFIX
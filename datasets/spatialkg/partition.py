@@ -0,0 +1,214 @@
+"""Partition the S2 cell and S2 integration .ttl files of a state by coarse S2 parent cell
+
+A state's S2 output is one file per layer (e.g., tx_48_s2-l13.ttl), so loading it is all-or-nothing and any
+change rewrites the whole file. The partitioner splits a file into one N-Triples file per coarse parent cell
+(level 8 by default, about 1,500 km2), derived from the cell ID in the S2 cell IRI, and writes a manifest (JSON)
+with each partition's cell ID range, triple count, file, and named graph. Partitions can then be validated and
+uploaded in parallel (e.g., upload.upload_files(manifest_files(manifest))), and a tool that needs one area (e.g.,
+a watershed) loads only the partitions whose cell ID ranges overlap the area's cells (select_partitions).
+
+Each triple goes to the partition of its subject if the subject is an S2 cell (or an S2 cell geometry), else to
+the partition of its object (e.g., county kwg-ont:sfContains cell). So a cell's triples, its geometry, and both
+directions of its sfWithin / sfContains and sfOverlaps relations are always in the same partition. Triples
+without an S2 cell (or whose cells are coarser than the partition level) go to an 'other' partition.
+
+Under ### Input Files ###, define
+    the list of paths/filenames of the S2 cell and S2 integration .ttl files to partition
+Under ### Partition ###, define
+    the level (0-30) of the partition cells
+    the base IRI for the partitions' named graphs (or None for no named graphs)
+
+Required:
+    * datetime, json, logging, os, re, time
+
+Functions:
+    * cell_token - returns the S2 token (short hex form) of a cell ID
+    * partition_file - splits a .ttl file into one N-Triples file per partition and writes its manifest
+    * partition_state_outputs - partitions a state's S2 cell and S2 integration files
+    * read_manifest - reads a partition manifest
+    * select_partitions - returns the partitions that overlap a set of S2 cells
+    * manifest_files - returns the partition files of a manifest and their named graphs (for upload_files)
+"""
+import datetime
+import json
+import logging
+import os
+import re
+import time
+
+from .config import GRAPH_BASE, LEVEL1_OUTPATH, LEVEL2_OUTPATH, LEVEL3_OUTPATH, S2_OUTPATH
+from .s2_cell_ranges import cell_level, parent_id, range_max, range_min
+from .turtle import nt_term, read_triples
+
+### Input Files ###
+ttl_files = ['ttl_files/S2_cells/me_23_s2-l13.ttl',
+             'ttl_files/AdministrativeRegion_2/s2_me_23_admin-regions_level-2.ttl']
+
+### Partition ###
+partition_level = 8
+graph_base = None
+
+# The number of lines kept per partition before they are appended to its file
+BUFFER_LINES = 10000
+OTHER = 'other'
+_CELL_IRI = re.compile(r's2\.level\d+\.(\d+)$')
+
+logger = logging.getLogger(__name__)
+
+
+def cell_token(cell_id: int) -> str:
+    """Returns the S2 token of a cell ID (its hex form without trailing zeros, e.g., '4cb' for a level 4 cell)
+
+    :param cell_id: an S2 cell ID
+    :return: the token
+    """
+    return format(cell_id, '016x').rstrip('0') or 'X'
+
+
+def _flush(outfile: str, lines: list) -> None:
+    with open(outfile, 'a', encoding='utf-8') as f:
+        f.writelines(lines)
+    lines.clear()
+
+
+def partition_file(infile: str, level: int = 8, outdir: str = None, graph: str = None) -> dict:
+    """Splits a .ttl (or .nt) file into one N-Triples file per S2 cell at a coarse level and writes a manifest
+
+    The partition files are written to outdir as <file name>_<token>.nt and the manifest as
+    <file name>_manifest.json (existing partition files of the same file are replaced).
+
+    :param infile: path/filename of an S2 cell or S2 integration .ttl file
+    :param level: the level of the partition cells (coarser than the cells in the file, e.g., 6 or 8)
+    :param outdir: the output folder; defaults to <file name>_parts-l<level>/ next to the input file
+    :param graph: the base IRI of the partitions' named graphs (<graph>/<token>), or None for no named graphs
+    :return: the manifest (a dictionary; see read_manifest)
+    """
+    stem = os.path.splitext(os.path.basename(infile))[0]
+    outdir = outdir or os.path.join(os.path.dirname(infile), f'{stem}_parts-l{level}')
+    os.makedirs(outdir, exist_ok=True)
+    for name in os.listdir(outdir):
+        if name.startswith(stem + '_') and name.endswith('.nt'):
+            os.remove(os.path.join(outdir, name))
+
+    partition_of = {}  # IRI -> partition cell ID (None if the IRI is not an S2 cell at or below the level)
+    buffers, counts = {}, {}  # partition cell ID (or OTHER) -> lines / number of triples
+    n_triples = 0
+
+    def cell_partition(term):
+        if isinstance(term, tuple):
+            return None
+        if term not in partition_of:
+            match = _CELL_IRI.search(term)
+            cell_id = int(match.group(1)) if match else 0
+            partition_of[term] = parent_id(cell_id, level) if cell_id and cell_level(cell_id) >= level else None
+        return partition_of[term]
+
+    def outfile(key):
+        return os.path.join(outdir, f"{stem}_{OTHER if key == OTHER else cell_token(key)}.nt")
+
+    for s, p, o in read_triples(infile):
+        key = cell_partition(s)
+        if key is None:
+            key = cell_partition(o)
+        if key is None:
+            key = OTHER
+        lines = buffers.setdefault(key, [])
+        lines.append(f'{nt_term(s)} <{p}> {nt_term(o)} .\n')
+        counts[key] = counts.get(key, 0) + 1
+        n_triples += 1
+        if len(lines) >= BUFFER_LINES:
+            _flush(outfile(key), lines)
+    for key, lines in buffers.items():
+        if lines:
+            _flush(outfile(key), lines)
+
+    partitions = []
+    for key in sorted(counts, key=lambda k: (k == OTHER, 0 if k == OTHER else k)):
+        token = OTHER if key == OTHER else cell_token(key)
+        partition = {'token': token, 'file': os.path.basename(outfile(key)), 'triples': counts[key],
+                     'graph': f'{graph}/{token}' if graph else None}
+        if key != OTHER:
+            partition.update({'cell_id': key, 'cell_id_min': range_min(key), 'cell_id_max': range_max(key)})
+        partitions.append(partition)
+    manifest = {'source': infile, 'level': level, 'triples': n_triples, 'partitions': partitions}
+    with open(os.path.join(outdir, f'{stem}_manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    logger.info(f'{infile}: {n_triples} triples in {len(partitions)} partitions (level {level}) in {outdir}')
+    return manifest
+
+
+def partition_state_outputs(abbr: str, fips: str, level: int = 8, base: str = GRAPH_BASE) -> list:
+    """Partitions a state's S2 cell file and its S2 integration files (levels 1-3) that exist
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :param level: the level of the partition cells
+    :param base: the base IRI of the named graphs (graphs are <base><abbr>_<fips>/<token>), or None
+    :return: a list of the manifests' paths/filenames
+    """
+    state = abbr.lower() + '_' + fips
+    infiles = [S2_OUTPATH + state + '_s2-l13.ttl'] + \
+              [path + 's2_' + state + f'_admin-regions_level-{n}.ttl'
+               for n, path in [(1, LEVEL1_OUTPATH), (2, LEVEL2_OUTPATH), (3, LEVEL3_OUTPATH)]]
+    manifests = []
+    for infile in [f for f in infiles if os.path.exists(f)]:
+        partition_file(infile, level, graph=base + state if base else None)
+        stem = os.path.splitext(os.path.basename(infile))[0]
+        manifests.append(os.path.join(os.path.dirname(infile), f'{stem}_parts-l{level}', f'{stem}_manifest.json'))
+    return manifests
+
+
+def read_manifest(manifest_file: str) -> dict:
+    """Reads a partition manifest
+
+    :param manifest_file: path/filename of a manifest written by partition_file
+    :return: a dictionary with the 'source' file, partition 'level', number of 'triples', and a list of
+             'partitions' (token, file (relative to the manifest), triples, graph, and, except for the 'other'
+             partition, cell_id, cell_id_min, and cell_id_max); 'folder' is added (the manifest's folder)
+    """
+    with open(manifest_file, 'r') as f:
+        manifest = json.load(f)
+    manifest['folder'] = os.path.dirname(manifest_file)
+    return manifest
+
+
+def select_partitions(manifest: dict, cell_ids: list) -> list:
+    """Returns the partitions that overlap a set of S2 cells (of any level), e.g., the cells of a watershed
+
+    :param manifest: a manifest (see read_manifest)
+    :param cell_ids: a list of S2 cell IDs
+    :return: a list of the partitions (dictionaries) whose cell ID range overlaps a cell's range
+    """
+    ranges = sorted((range_min(c), range_max(c)) for c in cell_ids)
+    selected = []
+    for partition in manifest['partitions']:
+        if 'cell_id' in partition and any(low <= partition['cell_id_max'] and partition['cell_id_min'] <= high
+                                          for low, high in ranges):
+            selected.append(partition)
+    return selected
+
+
+def manifest_files(manifest: dict, partitions: list = None) -> dict:
+    """Returns the files of (some of) the partitions of a manifest with their named graphs
+
+    :param manifest: a manifest (see read_manifest)
+    :param partitions: the partitions to include (e.g., from select_partitions); defaults to all
+    :return: a dictionary of path/filename -> named graph IRI (or None), as used by upload.upload_files
+    """
+    folder = manifest.get('folder', '')
+    return {os.path.join(folder, p['file']): p['graph'] for p in partitions or manifest['partitions']}
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_partition.txt')
+    start_time = time.time()
+    logger.info(f'Launching script: partition {ttl_files} at level {partition_level}')
+    for ttl_file in ttl_files:
+        file_manifest = partition_file(ttl_file, partition_level, graph=graph_base)
+        print(f"{ttl_file}: {file_manifest['triples']} triples in {len(file_manifest['partitions'])} partitions")
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
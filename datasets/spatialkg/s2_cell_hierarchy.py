@@ -0,0 +1,383 @@
+"""Derive the S2 cell hierarchy and S2 cell adjacency locally from cell IDs (vectorized with NumPy)
+
+Parents, children, and edge / vertex neighbors of an S2 cell are all functions of its 64-bit cell ID,
+so the kwg-ont:sfWithin / kwg-ont:sfContains (cell hierarchy) and kwg-ont:sfTouches (adjacency) triples
+for a set of S2 cells can be computed without querying KnowWhereGraph. All functions take and return
+NumPy uint64 arrays of cell IDs and work on whole arrays at once. The cell ID <-> (face, i, j) conversion
+follows the reference S2 implementation (Hilbert curve lookup tables of 4 bits per step).
+
+Under ### Input / Output Files ###, define
+    the path/filename of a state's Level 13 S2 cell .ttl file
+    the path/filename for the output S2 cell pyramid .ttl file
+Under ### Pyramid Levels ###, define
+    the coarsest level of the S2 cell pyramid
+
+Required:
+    * numpy
+    * rdflib (Literal)
+    * rdflib.namespace (RDF, XSD)
+    * terms (interned S2 cell IRIs)
+    * namespaces (the project namespaces) - only when run as a module
+    * datetime, logging, re, time
+
+Functions:
+    * cell_ids_from_iris - converts KWG S2 cell IRIs to an array of cell IDs
+    * cell_local_names - converts an array of cell IDs to KWG S2 cell IRI local names (e.g., 's2.level13.<id>')
+    * lowest_bits - returns the least significant set bit of each cell ID
+    * cell_levels - returns the level of each cell ID
+    * parents - returns the ancestors of cells at a given level
+    * children - returns the four children of each cell
+    * edge_neighbors - returns the four cells that share an edge with each cell
+    * vertex_neighbors - returns the four cells diagonal to each cell (sharing only a vertex)
+    * all_neighbors - returns the (up to) eight cells that touch each cell
+    * touches_pairs - returns the unique (cell, neighbor) pairs for an array of cells
+    * add_within_triples - adds sfWithin / sfContains triples between cells and their ancestors to a graph
+    * add_touches_triples - adds sfTouches triples between cells and their neighbors to a graph
+    * add_pyramid_triples - adds S2 cell class, cellID, and hierarchy triples for the ancestors of cells to a graph
+    * cell_ids_from_ttl - reads the cell IDs (kwg-ont:cellID) from an S2 cell .ttl file
+"""
+import numpy as np
+from rdflib import Literal
+from rdflib.namespace import RDF, XSD
+
+from .terms import SF_CONTAINS, SF_TOUCHES, SF_WITHIN, uri
+
+import datetime
+import logging
+import re
+import time
+
+### Input / Output Files ###
+s2_file = 'ttl_files/S2_cells/me_23_s2-l13.ttl'
+pyramid_file = 'ttl_files/S2_cells/me_23_s2-l09-l12.ttl'
+
+### Pyramid Levels ###
+pyramid_min_level = 9
+
+MAX_LEVEL = 30
+MAX_SIZE = 1 << MAX_LEVEL  # number of leaf cells along the edge of a cube face
+_LOOKUP_BITS = 4
+_SWAP_MASK = 0x01
+_INVERT_MASK = 0x02
+_POS_TO_IJ = ((0, 1, 3, 2), (0, 2, 3, 1), (3, 2, 0, 1), (3, 1, 0, 2))
+_POS_TO_ORIENTATION = (_SWAP_MASK, 0, 0, _INVERT_MASK | _SWAP_MASK)
+_U1 = np.uint64(1)
+
+logger = logging.getLogger(__name__)
+
+
+def _build_lookup_tables() -> tuple:
+    """Builds the (i, j) <-> Hilbert curve position lookup tables for 4 levels at a time
+
+    :return: the LOOKUP_POS and LOOKUP_IJ tables as NumPy int64 arrays
+    """
+    lookup_pos = np.zeros(1 << (2 * _LOOKUP_BITS + 2), dtype=np.int64)
+    lookup_ij = np.zeros(1 << (2 * _LOOKUP_BITS + 2), dtype=np.int64)
+
+    def init_cell(level, i, j, orig_orientation, pos, orientation):
+        if level == _LOOKUP_BITS:
+            ij = (i << _LOOKUP_BITS) + j
+            lookup_pos[(ij << 2) + orig_orientation] = (pos << 2) + orientation
+            lookup_ij[(pos << 2) + orig_orientation] = (ij << 2) + orientation
+            return
+        r = _POS_TO_IJ[orientation]
+        for index in range(4):
+            init_cell(level + 1, (i << 1) + (r[index] >> 1), (j << 1) + (r[index] & 1), orig_orientation,
+                      (pos << 2) + index, orientation ^ _POS_TO_ORIENTATION[index])
+
+    for orientation in range(4):
+        init_cell(0, 0, 0, orientation, 0, orientation)
+    return lookup_pos, lookup_ij
+
+
+_LOOKUP_POS, _LOOKUP_IJ = _build_lookup_tables()
+
+
+def cell_ids_from_iris(iris) -> np.ndarray:
+    """Converts KWG S2 cell IRIs (or their local names) to an array of cell IDs
+
+    :param iris: an iterable of S2 cell IRIs (e.g., 'http://.../resource/s2.level13.9791451744595607552')
+    :return: a NumPy uint64 array of cell IDs
+    """
+    return np.array([int(str(iri).rsplit('.', 1)[1]) for iri in iris], dtype=np.uint64)
+
+
+def cell_local_names(ids: np.ndarray) -> list:
+    """Converts an array of cell IDs to KWG S2 cell IRI local names
+
+    :param ids: a NumPy uint64 array of cell IDs
+    :return: a list of local names (e.g., 's2.level13.9791451744595607552')
+    """
+    return [f's2.level{level}.{cell}' for level, cell in zip(cell_levels(ids).tolist(), ids.tolist())]
+
+
+def lowest_bits(ids: np.ndarray) -> np.ndarray:
+    """Returns the least significant set bit of each cell ID
+
+    :param ids: a NumPy uint64 array of cell IDs
+    :return: a NumPy uint64 array of lowest bits (e.g., 2**34 for a level 13 cell)
+    """
+    ids = np.asarray(ids, dtype=np.uint64)
+    return ids & (~ids + _U1)
+
+
+def _lowest_bit_for_level(level: int) -> np.uint64:
+    return np.uint64(1 << (2 * (MAX_LEVEL - level)))
+
+
+def cell_levels(ids: np.ndarray) -> np.ndarray:
+    """Returns the level of each cell ID
+
+    :param ids: a NumPy uint64 array of cell IDs
+    :return: a NumPy int64 array of levels (0-30)
+    """
+    return MAX_LEVEL - np.log2(lowest_bits(ids).astype(np.float64)).astype(np.int64) // 2
+
+
+def parents(ids: np.ndarray, level: int) -> np.ndarray:
+    """Returns the ancestor of each cell at a given (coarser or equal) level
+
+    :param ids: a NumPy uint64 array of cell IDs
+    :param level: the level of the ancestors
+    :return: a NumPy uint64 array of ancestor cell IDs
+    """
+    lsb = _lowest_bit_for_level(level)
+    return (np.asarray(ids, dtype=np.uint64) & (~lsb + _U1)) | lsb
+
+
+def children(ids: np.ndarray) -> np.ndarray:
+    """Returns the four children of each cell in Hilbert curve order
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level < 30)
+    :return: a NumPy uint64 array with shape (n, 4)
+    """
+    ids = np.asarray(ids, dtype=np.uint64)
+    lsb = lowest_bits(ids)
+    child_lsb = lsb >> np.uint64(2)
+    first = ids - lsb + child_lsb
+    return first[:, None] + (child_lsb << _U1)[:, None] * np.arange(4, dtype=np.uint64)[None, :]
+
+
+def _to_face_ij(ids: np.ndarray) -> tuple:
+    """Converts cell IDs to their cube face and the (i, j) leaf coordinates of the cell on that face"""
+    ids = np.asarray(ids, dtype=np.uint64)
+    face = (ids >> np.uint64(61)).astype(np.int64)
+    i = np.zeros(ids.shape, dtype=np.int64)
+    j = np.zeros(ids.shape, dtype=np.int64)
+    bits = face & _SWAP_MASK
+    for k in range(7, -1, -1):
+        nbits = MAX_LEVEL - 7 * _LOOKUP_BITS if k == 7 else _LOOKUP_BITS
+        chunk = (ids >> np.uint64(k * 2 * _LOOKUP_BITS + 1)) & np.uint64((1 << (2 * nbits)) - 1)
+        bits = _LOOKUP_IJ[bits + (chunk.astype(np.int64) << 2)]
+        i += (bits >> (_LOOKUP_BITS + 2)) << (k * _LOOKUP_BITS)
+        j += ((bits >> 2) & ((1 << _LOOKUP_BITS) - 1)) << (k * _LOOKUP_BITS)
+        bits &= _SWAP_MASK | _INVERT_MASK
+    return face, i, j
+
+
+def _from_face_ij(face: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Converts cube faces and (i, j) leaf coordinates (within the face) to leaf cell IDs"""
+    n = face.astype(np.uint64) << np.uint64(60)
+    bits = face & _SWAP_MASK
+    mask = (1 << _LOOKUP_BITS) - 1
+    for k in range(7, -1, -1):
+        bits = _LOOKUP_POS[bits + (((i >> (k * _LOOKUP_BITS)) & mask) << (_LOOKUP_BITS + 2))
+                           + (((j >> (k * _LOOKUP_BITS)) & mask) << 2)]
+        n |= (bits >> 2).astype(np.uint64) << np.uint64(k * 2 * _LOOKUP_BITS)
+        bits &= _SWAP_MASK | _INVERT_MASK
+    return (n << _U1) + _U1
+
+
+def _face_uv_to_xyz(face: np.ndarray, u: np.ndarray, v: np.ndarray) -> tuple:
+    ones = np.ones_like(u)
+    x = np.choose(face, [ones, -u, -u, -ones, v, v])
+    y = np.choose(face, [u, ones, -v, -v, -ones, u])
+    z = np.choose(face, [v, v, ones, -u, -u, -ones])
+    return x, y, z
+
+
+def _xyz_to_face_uv(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> tuple:
+    ax, ay, az = np.abs(x), np.abs(y), np.abs(z)
+    axis = np.where(ax > ay, np.where(ax > az, 0, 2), np.where(ay > az, 1, 2))
+    component = np.choose(axis, [x, y, z])
+    face = axis + 3 * (component < 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u = np.choose(face, [y / x, -x / y, -x / z, z / x, z / y, -y / z])
+        v = np.choose(face, [z / x, z / y, -y / z, y / x, -x / y, -x / z])
+    return face, u, v
+
+
+def _st_to_ij(s: np.ndarray) -> np.ndarray:
+    return np.clip(np.floor(MAX_SIZE * s).astype(np.int64), 0, MAX_SIZE - 1)
+
+
+def _from_face_ij_wrap(face: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Converts (i, j) leaf coordinates that may lie just beyond a cube face to leaf cell IDs on the adjacent face"""
+    i = np.clip(i, -1, MAX_SIZE)
+    j = np.clip(j, -1, MAX_SIZE)
+    scale = 1.0 / MAX_SIZE
+    u = scale * ((i << 1) + 1 - MAX_SIZE)
+    v = scale * ((j << 1) + 1 - MAX_SIZE)
+    face, u, v = _xyz_to_face_uv(*_face_uv_to_xyz(face, u, v))
+    return _from_face_ij(face, _st_to_ij(0.5 * (u + 1)), _st_to_ij(0.5 * (v + 1)))
+
+
+def _neighbors(ids: np.ndarray, offsets: list) -> np.ndarray:
+    """Returns the same-level cells at (di, dj) cell offsets from each cell, wrapping across cube faces
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :param offsets: a list of (di, dj) offsets in units of the cells' size
+    :return: a NumPy uint64 array with shape (n, len(offsets))
+    """
+    ids = np.asarray(ids, dtype=np.uint64)
+    if ids.size == 0:
+        return np.zeros((0, len(offsets)), dtype=np.uint64)
+    level = int(cell_levels(ids[:1])[0])
+    size = 1 << (MAX_LEVEL - level)
+    face, i, j = _to_face_ij(ids)
+    i &= -size  # lower left leaf cell of each cell
+    j &= -size
+    result = np.empty((ids.size, len(offsets)), dtype=np.uint64)
+    for column, (di, dj) in enumerate(offsets):
+        ni = i + di * size
+        nj = j + dj * size
+        same_face = (ni >= 0) & (ni < MAX_SIZE) & (nj >= 0) & (nj < MAX_SIZE)
+        leaf = np.where(same_face,
+                        _from_face_ij(face, np.clip(ni, 0, MAX_SIZE - 1), np.clip(nj, 0, MAX_SIZE - 1)),
+                        _from_face_ij_wrap(face, ni, nj))
+        result[:, column] = parents(leaf, level)
+    return result
+
+
+def edge_neighbors(ids: np.ndarray) -> np.ndarray:
+    """Returns the four cells that share an edge with each cell (bottom, right, top, left in (i, j) space)
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :return: a NumPy uint64 array with shape (n, 4)
+    """
+    return _neighbors(ids, [(0, -1), (1, 0), (0, 1), (-1, 0)])
+
+
+def vertex_neighbors(ids: np.ndarray) -> np.ndarray:
+    """Returns the four cells diagonal to each cell (sharing only a vertex)
+
+    At the eight corners of the S2 cube only three cells meet, so one of the diagonal cells of a corner cell
+    is also one of its edge neighbors.
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :return: a NumPy uint64 array with shape (n, 4)
+    """
+    return _neighbors(ids, [(-1, -1), (1, -1), (1, 1), (-1, 1)])
+
+
+def all_neighbors(ids: np.ndarray) -> np.ndarray:
+    """Returns the eight cells that touch each cell (edge neighbors followed by vertex neighbors)
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :return: a NumPy uint64 array with shape (n, 8); corner cells of the S2 cube contain one duplicate
+    """
+    return np.hstack([edge_neighbors(ids), vertex_neighbors(ids)])
+
+
+def touches_pairs(ids: np.ndarray) -> np.ndarray:
+    """Returns the unique (cell, neighbor) pairs of touching cells for an array of cells
+
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :return: a NumPy uint64 array with shape (m, 2), sorted by cell and then neighbor
+    """
+    ids = np.unique(np.asarray(ids, dtype=np.uint64))
+    neighbors = all_neighbors(ids)
+    pairs = np.column_stack([np.repeat(ids, neighbors.shape[1]), neighbors.ravel()])
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    return np.unique(pairs, axis=0)
+
+
+def add_within_triples(kg, ids: np.ndarray, level: int, _PREFIX: dict) -> None:
+    """Adds sfWithin triples from cells to their ancestors at a given level (and the inverse sfContains triples)
+
+    :param kg: an RDFLib graph
+    :param ids: a NumPy uint64 array of cell IDs
+    :param level: the level of the ancestors
+    :param _PREFIX: a dictionary of project namespaces
+    :return: None
+    """
+    ids = np.unique(np.asarray(ids, dtype=np.uint64))
+    kwgr = str(_PREFIX['kwgr'])
+    for cell, parent in zip(cell_local_names(ids), cell_local_names(parents(ids, level))):
+        s2_iri = uri(kwgr + cell)
+        parent_iri = uri(kwgr + parent)  # Siblings share their (interned) parent IRI
+        kg.add((s2_iri, SF_WITHIN, parent_iri))
+        kg.add((parent_iri, SF_CONTAINS, s2_iri))
+
+
+def add_touches_triples(kg, ids: np.ndarray, _PREFIX: dict) -> None:
+    """Adds sfTouches triples (in both directions) between cells and all of their same-level neighbors
+
+    :param kg: an RDFLib graph
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :param _PREFIX: a dictionary of project namespaces
+    :return: None
+    """
+    pairs = touches_pairs(ids)
+    kwgr = str(_PREFIX['kwgr'])
+    for cell, touched in zip(cell_local_names(pairs[:, 0]), cell_local_names(pairs[:, 1])):
+        # Each cell is in up to 8 pairs, so its (interned) IRI is created once
+        s2_iri = uri(kwgr + cell)
+        touched_iri = uri(kwgr + touched)
+        kg.add((s2_iri, SF_TOUCHES, touched_iri))
+        kg.add((touched_iri, SF_TOUCHES, s2_iri))
+
+
+def add_pyramid_triples(kg, ids: np.ndarray, min_level: int, _PREFIX: dict) -> None:
+    """Adds the ancestors of cells from the cells' parent level up to min_level, with class, cellID, and
+          sfWithin / sfContains triples between each level and the next coarser one
+
+    :param kg: an RDFLib graph
+    :param ids: a NumPy uint64 array of cell IDs (all at the same level)
+    :param min_level: the coarsest level of the pyramid (e.g., 9)
+    :param _PREFIX: a dictionary of project namespaces
+    :return: None
+    """
+    level_ids = np.unique(np.asarray(ids, dtype=np.uint64))
+    if level_ids.size == 0:
+        return
+    level = int(cell_levels(level_ids[:1])[0])
+    while level > min_level:
+        add_within_triples(kg, level_ids, level - 1, _PREFIX)
+        level -= 1
+        level_ids = np.unique(parents(level_ids, level))
+        s2_class = _PREFIX['kwg-ont'][f'S2Cell_Level{level}']
+        for name, cell in zip(cell_local_names(level_ids), level_ids.tolist()):
+            s2_iri = _PREFIX['kwgr'][name]
+            kg.add((s2_iri, RDF.type, s2_class))
+            kg.add((s2_iri, _PREFIX['kwg-ont']['cellID'], Literal(cell, datatype=XSD.integer)))
+
+
+def cell_ids_from_ttl(infile: str) -> np.ndarray:
+    """Reads the cell IDs (kwg-ont:cellID values) from an S2 cell .ttl file without parsing the whole graph
+
+    :param infile: path/filename of an S2 cell .ttl file (e.g., 'ttl_files/S2_cells/me_23_s2-l13.ttl')
+    :return: a NumPy uint64 array of cell IDs
+    """
+    cell_id = re.compile(r'kwg-ont:cellID\s+"?(\d+)')
+    with open(infile, 'r') as f:
+        return np.array([int(m.group(1)) for line in f if (m := cell_id.search(line))], dtype=np.uint64)
+
+
+if __name__ == "__main__":
+    from rdflib import Graph
+    from .config import setup_logging
+    from .namespaces import get_prefixes
+
+    _PREFIX = get_prefixes()
+    logger = setup_logging('logs/log_s2_cell_hierarchy.txt')
+    start_time = time.time()
+    logger.info(f'Launching script: S2 cell pyramid from {s2_file}')
+    kg = Graph()
+    for prefix in _PREFIX:
+        kg.bind(prefix, _PREFIX[prefix])
+    add_pyramid_triples(kg, cell_ids_from_ttl(s2_file), pyramid_min_level, _PREFIX)
+    logger.info(f'Write S2 cell pyramid triples to {pyramid_file}')
+    kg.serialize(pyramid_file, format='turtle')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
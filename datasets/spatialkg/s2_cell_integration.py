@@ -0,0 +1,163 @@
+"""Integrate S2 cells with administrative region polygons locally (sfWithin / sfOverlaps)
+
+KnowWhereGraph provides the S2 cell integration for states and counties, but not for county subdivisions
+(kwg-ont:AdministrativeRegion_3). This module computes it from
+    * the county subdivision polygons (the same TIGER shapefile that AdminRegionLevel3-2ttl.py triplifies) and
+    * the Level 13 S2 cell geometries in a state's S2 cell .ttl file (ttl_files/S2_cells/*_s2-l13.ttl)
+The cells are bulk-loaded into an STRtree and every cell-polygon pair whose interiors intersect is classified
+with vectorized shapely predicates as sfWithin (the cell is within the polygon) or sfOverlaps (otherwise).
+The work is split by county and run in parallel worker processes, each holding its own copy of the tree.
+
+The output .ttl file has the same layout as the county integration written by county_s2_cell_integration_2ttl():
+    sfWithin triples (and their sfContains inverses) and sfOverlaps triples in both directions.
+
+Required:
+    * geopandas
+    * numpy
+    * shapely
+    * rdflib (Graph)
+    * rdflib.namespace (GEO)
+    * terms (SF_WITHIN, SF_CONTAINS, and SF_OVERLAPS)
+    * concurrent.futures, logging, os
+
+Functions:
+    * read_s2_cell_geometries - reads S2 cell IRIs and geometries from an S2 cell .ttl file
+    * classify_cells - classifies the S2 cells that intersect a set of polygons as within or overlapping
+    * integrate_county_subdivisions - classifies S2 cells against all county subdivisions, in parallel by county
+    * county_subs_s2_cell_integration_2ttl - writes the S2 cell integration for a state's county subdivisions
+"""
+import geopandas as gpd
+import numpy as np
+import shapely
+from rdflib import Graph
+from rdflib.namespace import GEO
+
+from .terms import SF_CONTAINS, SF_OVERLAPS, SF_WITHIN
+
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Each worker process holds the S2 cells of the current state and an STRtree of their geometries
+_worker_cells = None
+
+
+def read_s2_cell_geometries(infile: str) -> gpd.GeoDataFrame:
+    """Reads the S2 cells and their default geometries from an S2 cell .ttl file
+
+    :param infile: path/filename of an S2 cell .ttl file (e.g., 'ttl_files/S2_cells/me_23_s2-l13.ttl')
+    :return: a GeoDataFrame (EPSG:4326) with the S2 cell IRIs in column 's2'
+    """
+    kg = Graph()
+    kg.parse(infile, format='turtle')
+    cells, wkts = [], []
+    for s2, geom in kg.subject_objects(GEO.defaultGeometry):
+        wkt = kg.value(geom, GEO.asWKT)
+        if wkt is None:
+            continue
+        wkt = str(wkt).strip()
+        if wkt.startswith('<'):  # drop a leading CRS IRI (e.g., <http://www.opengis.net/def/crs/OGC/1.3/CRS84>)
+            wkt = wkt[wkt.index('>') + 1:].strip()
+        cells.append(str(s2))
+        wkts.append(wkt)
+    return gpd.GeoDataFrame({'s2': cells}, geometry=shapely.from_wkt(wkts), crs='EPSG:4326')
+
+
+def classify_cells(polygons: np.ndarray, tree: shapely.STRtree, cells: np.ndarray) -> tuple:
+    """Classifies the S2 cells whose interiors intersect each polygon as within or overlapping the polygon
+
+    :param polygons: a NumPy array of shapely polygons
+    :param tree: an STRtree built from the S2 cell geometries
+    :param cells: the NumPy array of S2 cell geometries the tree was built from
+    :return: three NumPy arrays of equal length: polygon index, cell index, and True if the cell is within
+    """
+    polygon_idx, cell_idx = tree.query(polygons, predicate='intersects')
+    cell_geoms = cells[cell_idx]
+    polygon_geoms = polygons[polygon_idx]
+    interior = ~shapely.touches(cell_geoms, polygon_geoms)  # drop cells that only share a boundary
+    polygon_idx, cell_idx = polygon_idx[interior], cell_idx[interior]
+    within = shapely.within(cell_geoms[interior], polygon_geoms[interior])
+    return polygon_idx, cell_idx, within
+
+
+def _init_worker(cell_iris: list, cell_wkb: list) -> None:
+    """Builds the STRtree of S2 cells once per worker process"""
+    global _worker_cells
+    cells = shapely.from_wkb(cell_wkb)
+    shapely.prepare(cells)
+    _worker_cells = (np.asarray(cell_iris), cells, shapely.STRtree(cells))
+
+
+def _integrate_county(geoids: list, polygon_wkb: list) -> list:
+    """Classifies the S2 cells of the worker's state against the county subdivisions of a single county
+
+    :param geoids: the GEOIDs of the county subdivisions
+    :param polygon_wkb: the WKB geometries of the county subdivisions
+    :return: a list of (GEOID, S2 cell IRI, is within) tuples
+    """
+    cell_iris, cells, tree = _worker_cells
+    polygons = shapely.from_wkb(polygon_wkb)
+    polygon_idx, cell_idx, within = classify_cells(polygons, tree, cells)
+    return list(zip(np.asarray(geoids)[polygon_idx].tolist(), cell_iris[cell_idx].tolist(), within.tolist()))
+
+
+def integrate_county_subdivisions(gdf_cousubs: gpd.GeoDataFrame, gdf_cells: gpd.GeoDataFrame,
+                                  max_workers: int = None) -> list:
+    """Classifies S2 cells against every county subdivision in a state, in parallel by county
+
+    :param gdf_cousubs: a GeoDataFrame of county subdivisions (TIGER columns COUNTYFP and GEOID) in EPSG:4326
+    :param gdf_cells: a GeoDataFrame of S2 cells as returned by read_s2_cell_geometries()
+    :param max_workers: the number of worker processes (defaults to the number of CPUs)
+    :return: a list of (GEOID, S2 cell IRI, is within) tuples
+    """
+    cell_wkb = shapely.to_wkb(gdf_cells.geometry.values).tolist()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(gdf_cells['s2'].tolist(), cell_wkb)) as executor:
+        futures = []
+        for county, gdf_county in gdf_cousubs.groupby('COUNTYFP'):
+            futures.append(executor.submit(_integrate_county, gdf_county['GEOID'].tolist(),
+                                           shapely.to_wkb(gdf_county.geometry.values).tolist()))
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def county_subs_s2_cell_integration_2ttl(cousub_file: str, s2_file: str, outfile: str, _PREFIX: dict,
+                                         max_workers: int = None) -> None:
+    """Writes the S2 cell integration for a state's county subdivisions (AdministrativeRegion_3) to a .ttl file
+
+    :param cousub_file: path/filename of a Census Bureau .shp file of county subdivisions for a state
+    :param s2_file: path/filename of the state's Level 13 S2 cell .ttl file
+    :param outfile: path/filename for the output .ttl file
+    :param _PREFIX: a dictionary of project namespaces
+    :param max_workers: the number of worker processes (defaults to the number of CPUs)
+    :return: None
+    """
+    logger.info(f'Read county subdivisions from {cousub_file}')
+    gdf_cousubs = gpd.read_file(cousub_file).to_crs('EPSG:4326')
+    gdf_cousubs = gdf_cousubs[~gdf_cousubs.geometry.is_empty & gdf_cousubs.geometry.notna()]
+    logger.info(f'Read S2 cell geometries from {s2_file}')
+    gdf_cells = read_s2_cell_geometries(s2_file)
+    logger.info(f'Integrate {len(gdf_cells.index)} S2 cells with {len(gdf_cousubs.index)} county subdivisions')
+    pairs = integrate_county_subdivisions(gdf_cousubs, gdf_cells, max_workers)
+
+    kg = Graph()
+    for prefix in _PREFIX:
+        kg.bind(prefix, _PREFIX[prefix])
+    kwgr = str(_PREFIX['kwgr'])
+    for geoid, s2, within in pairs:
+        cousub_iri = _PREFIX['dcgeoid'][geoid]
+        s2_iri = _PREFIX['kwgr'][s2.replace(kwgr, '')]
+        if within:
+            # Create triples (within and its inverse, contains)
+            kg.add((s2_iri, SF_WITHIN, cousub_iri))
+            kg.add((cousub_iri, SF_CONTAINS, s2_iri))
+        else:
+            # Create triples (overlaps is reflexive)
+            kg.add((s2_iri, SF_OVERLAPS, cousub_iri))
+            kg.add((cousub_iri, SF_OVERLAPS, s2_iri))
+    logger.info(f'Write county subdivision S2 cell integration triples to {outfile}')
+    kg.serialize(outfile, format='turtle')
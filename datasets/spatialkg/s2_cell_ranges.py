@@ -0,0 +1,239 @@
+"""Build compact SPARQL filters for sets of S2 cells from their cell IDs
+
+S2 cell IDs are hierarchical 64-bit integers: every descendant of a cell has an ID between the cell's
+range_min and range_max, and the IDs of the descendants at any one level are contiguous within that range.
+Because each S2 cell is triplified with its ID (kwg-ont:cellID, xsd:integer), a set of level 13 cells can be
+filtered with a handful of integer range predicates instead of a VALUES block listing every cell IRI.
+
+The set of cells is normalized by
+    1. dropping cells that are descendants of other cells in the set,
+    2. replacing every complete set of four siblings with their parent (down to a minimum level), and
+    3. merging cells whose ID ranges are contiguous into a single range.
+
+Under ### Region ###, define
+    the path/filename of an S2 integration .ttl file (e.g., 's2_me_23_admin-regions_level-1.ttl')
+    the IRI of the administrative region of interest
+Under ### Output File ###, define
+    the path/filename for the output SPARQL snippet
+
+Required:
+    * rdflib (Graph) - only for cells_from_integration()
+    * datetime, logging, re, time
+
+Functions:
+    * cell_id_from_iri - extracts the integer cell ID from a KWG S2 cell IRI
+    * cell_level - returns the level (0-30) of an S2 cell ID
+    * lowest_bit - returns the least significant bit of an S2 cell ID at a given level
+    * parent_id - returns the ID of a cell's ancestor at a given level
+    * range_min / range_max - return the smallest / largest leaf cell ID contained in a cell
+    * normalize_cells - reduces a set of cells to a minimal set of (possibly coarser) cells
+    * cell_id_ranges - reduces a set of cells to a sorted list of contiguous, inclusive cell ID ranges
+    * range_filter - creates a SPARQL FILTER on a cell ID variable from a list of ranges
+    * range_values - creates a SPARQL VALUES block of range bounds (plus its FILTER) from a list of ranges
+    * cells_from_integration - reads the S2 cells within or overlapping a region from an S2 integration .ttl file
+"""
+import datetime
+import logging
+import re
+import time
+
+### Region ###
+integration_file = 'ttl_files/AdministrativeRegion_1/s2_me_23_admin-regions_level-1.ttl'
+region_iri = 'http://stko-kwg.geog.ucsb.edu/lod/resource/administrativeRegion.USA.23'
+
+### Output File ###
+output_file = 'me_23_s2-l13_cellID-filter.rq'
+
+MAX_LEVEL = 30
+CELL_LEVEL = 13  # the level of the S2 cells triplified by SAWGraph
+_MASK64 = (1 << 64) - 1
+_CELL_IRI = re.compile(r's2\.level(?P<level>\d+)\.(?P<id>\d+)>?$')
+
+logger = logging.getLogger(__name__)
+
+
+def cell_id_from_iri(iri: str) -> int:
+    """Extracts the integer cell ID from a KWG S2 cell IRI
+
+    :param iri: an S2 cell IRI (e.g., 'http://stko-kwg.geog.ucsb.edu/lod/resource/s2.level13.9791451744595607552')
+    :return: the S2 cell ID as an int (e.g., 9791451744595607552)
+    """
+    match = _CELL_IRI.search(str(iri))
+    if match is None:
+        raise ValueError(f'Not an S2 cell IRI: {iri}')
+    return int(match.group('id'))
+
+
+def lowest_bit(level: int) -> int:
+    """Returns the least significant set bit shared by all S2 cell IDs at a given level
+
+    :param level: an S2 cell level (0-30)
+    :return: the lowest bit as an int (e.g., 2**34 for level 13)
+    """
+    return 1 << (2 * (MAX_LEVEL - level))
+
+
+def cell_level(cell_id: int) -> int:
+    """Returns the level of an S2 cell ID
+
+    :param cell_id: an S2 cell ID
+    :return: the cell's level (0-30)
+    """
+    return MAX_LEVEL - ((cell_id & -cell_id).bit_length() - 1) // 2
+
+
+def parent_id(cell_id: int, level: int) -> int:
+    """Returns the ID of a cell's ancestor at a given (coarser or equal) level
+
+    :param cell_id: an S2 cell ID
+    :param level: the level of the ancestor
+    :return: the ancestor's S2 cell ID
+    """
+    lsb = lowest_bit(level)
+    return ((cell_id & (-lsb & _MASK64)) | lsb) & _MASK64
+
+
+def range_min(cell_id: int) -> int:
+    """Returns the smallest leaf (level 30) cell ID contained in a cell"""
+    return cell_id - ((cell_id & -cell_id) - 1)
+
+
+def range_max(cell_id: int) -> int:
+    """Returns the largest leaf (level 30) cell ID contained in a cell"""
+    return cell_id + ((cell_id & -cell_id) - 1)
+
+
+def normalize_cells(cell_ids, min_level: int = 0) -> list:
+    """Reduces a set of S2 cells to the minimal set of cells that covers exactly the same area
+
+    Cells contained in other cells of the set are dropped and every complete set of four siblings is
+    replaced by their parent, as long as the parent's level is at least min_level. The result does not depend on
+    the order of the input (a cell and its first descendant have the same range_min):
+
+    >>> parent = lowest_bit(12)
+    >>> child = parent - lowest_bit(12) + lowest_bit(13)  # the first level 13 child of the level 12 cell
+    >>> normalize_cells([child, parent]) == normalize_cells([parent, child]) == [parent]
+    True
+
+    :param cell_ids: an iterable of S2 cell IDs (of any level)
+    :param min_level: the coarsest level allowed in the output
+    :return: a sorted list of S2 cell IDs
+    """
+    # Drop cells that are descendants of an earlier cell in ID order (ancestors sort before their descendants)
+    cells = []
+    for cell in sorted(set(cell_ids), key=lambda c: (range_min(c), -range_max(c))):
+        if cells and range_min(cell) <= range_max(cells[-1]):
+            continue
+        cells.append(cell)
+
+    # Replace complete sibling sets with their parents, finest level first
+    by_level = {}
+    for cell in cells:
+        by_level.setdefault(cell_level(cell), set()).add(cell)
+    for level in range(MAX_LEVEL, min_level, -1):
+        current = by_level.get(level)
+        if not current:
+            continue
+        parents = {}
+        for cell in current:
+            parents.setdefault(parent_id(cell, level - 1), []).append(cell)
+        for parent, children in parents.items():
+            if len(children) == 4:
+                current.difference_update(children)
+                by_level.setdefault(level - 1, set()).add(parent)
+    return sorted((cell for level_cells in by_level.values() for cell in level_cells), key=range_min)
+
+
+def cell_id_ranges(cell_ids, level: int = CELL_LEVEL) -> list:
+    """Reduces a set of S2 cells to a sorted list of contiguous, inclusive ranges of cell IDs at a given level
+
+    e.g., the 4**k level 13 descendants of a single level 13-k cell become one (first ID, last ID) range, and
+    adjacent cells with different parents are merged too:
+
+    >>> step = lowest_bit(13)
+    >>> cells = [lowest_bit(12) + k * step for k in (1, 3, 5)]  # two children of a level 12 cell, one of the next
+    >>> cell_id_ranges(cells) == [(cells[0], cells[-1])]
+    True
+
+    :param cell_ids: an iterable of S2 cell IDs at the given level (or coarser)
+    :param level: the level of the cell IDs the ranges are matched against (kwg-ont:cellID)
+    :return: a list of (first cell ID, last cell ID) tuples; single cells have first == last
+    """
+    offset = lowest_bit(level) - 1  # distance between a level's cell ID and its range_min / range_max
+    ranges = []
+    for cell in normalize_cells(cell_ids):
+        lo, hi = range_min(cell), range_max(cell)
+        # Leaf (level 30) cell IDs are odd, so adjacent leaf ranges are 2 apart
+        if ranges and lo == ranges[-1][1] + 2:
+            ranges[-1][1] = hi
+        else:
+            ranges.append([lo, hi])
+    return [(lo + offset, hi - offset) for lo, hi in ranges]
+
+
+def range_filter(ranges: list, var: str = '?cell_id') -> str:
+    """Creates a SPARQL FILTER that restricts a cell ID variable to a list of ranges
+
+    :param ranges: a list of (first cell ID, last cell ID) tuples as returned by cell_id_ranges()
+    :param var: the SPARQL variable bound to kwg-ont:cellID
+    :return: a FILTER(...) string
+    """
+    terms = []
+    for lo, hi in ranges:
+        if lo == hi:
+            terms.append(f'{var} = {lo}')
+        else:
+            terms.append(f'({var} >= {lo} && {var} <= {hi})')
+    return 'FILTER(' + '\n       || '.join(terms) + ')'
+
+
+def range_values(ranges: list, var: str = '?cell_id') -> str:
+    """Creates a SPARQL VALUES block of range bounds and the FILTER that applies them to a cell ID variable
+
+    :param ranges: a list of (first cell ID, last cell ID) tuples as returned by cell_id_ranges()
+    :param var: the SPARQL variable bound to kwg-ont:cellID
+    :return: a VALUES (...) { ... } block followed by a FILTER(...) string
+    """
+    rows = '\n'.join(f'    ({lo} {hi})' for lo, hi in ranges)
+    return (f'VALUES ({var}_min {var}_max) {{\n{rows}\n}}\n'
+            f'FILTER({var} >= {var}_min && {var} <= {var}_max)')
+
+
+def cells_from_integration(infile: str, region: str) -> list:
+    """Reads the S2 cells that are within or overlap a region from an S2 integration .ttl file
+
+    :param infile: path/filename of an S2 integration .ttl file (e.g., 's2_me_23_admin-regions_level-1.ttl')
+    :param region: the full IRI of the administrative region
+    :return: a list of S2 cell IDs
+    """
+    from rdflib import Graph, URIRef
+    kg = Graph()
+    kg.parse(infile, format='turtle')
+    kwg_ont = 'http://stko-kwg.geog.ucsb.edu/lod/ontology/'
+    cells = set()
+    for predicate in ['sfWithin', 'sfOverlaps']:
+        for s2 in kg.subjects(URIRef(kwg_ont + predicate), URIRef(region)):
+            if 's2.level' in str(s2):
+                cells.add(cell_id_from_iri(s2))
+    return sorted(cells)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename='logs/log_s2_cell_ranges.txt',
+                        filemode='a',
+                        format='%(asctime)s %(levelname)-8s %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S',
+                        level=logging.INFO)
+    logger.info('')
+    logger.info('LOGGER INITIALIZED')
+    start_time = time.time()
+    logger.info(f'Launching script: region = {region_iri}')
+    region_cells = cells_from_integration(integration_file, region_iri)
+    region_ranges = cell_id_ranges(region_cells)
+    logger.info(f'{len(region_cells)} cells reduced to {len(region_ranges)} cell ID ranges')
+    print(f'{len(region_cells)} cells reduced to {len(region_ranges)} cell ID ranges')
+    with open(output_file, 'w') as outfile:
+        outfile.write('# ?s2cell kwg-ont:cellID ?cell_id .\n')
+        outfile.write(range_filter(region_ranges) + '\n')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
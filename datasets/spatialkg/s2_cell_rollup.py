@@ -0,0 +1,204 @@
+"""Roll S2 cell integration up the administrative region hierarchy locally
+
+Instead of querying KnowWhereGraph once per administrative level, the integration of a coarser level is derived
+from the finest integration available (e.g., the state integration from the county integration) using the
+kwg-ont:administrativePartOf relations of the regions:
+    * a cell within a region is within the region's parent (sfWithin), and
+    * a cell that overlaps any of a parent's regions (and is not within any of them) is an overlap candidate;
+      candidates are classified as sfWithin or sfOverlaps against the parent's geometry when the geometries are
+      available and otherwise kept as sfOverlaps.
+Note: cells that intersect a parent only where none of its regions are (e.g., water outside of every county)
+are not found by the roll-up.
+
+The kwg-ont:administrativePartOf transitive closure (e.g., county subdivision -> state) can also be materialized
+so that queries like sparql/basics/Spatial_04.rq need a direct lookup instead of an administrativePartOf+ path.
+
+Required:
+    * numpy
+    * pandas
+    * shapely
+    * rdflib (Graph and URIRef)
+    * rdflib.namespace (GEO)
+    * s2_cell_integration (read_s2_cell_geometries)
+    * terms (KWG_ONT, SF_WITHIN, SF_CONTAINS, and SF_OVERLAPS)
+    * logging
+
+Functions:
+    * read_integration - reads the sfWithin / sfOverlaps relations between S2 cells and regions from a .ttl file
+    * read_part_of - reads the administrativePartOf relations from one or more administrative region .ttl files
+    * read_region_geometries - reads the default geometries of regions from one or more .ttl files
+    * roll_up - derives the integration of the parent regions from the integration of their parts
+    * s2_cell_rollup_2ttl - derives a coarser S2 cell integration from a finer one and writes it to a .ttl file
+    * part_of_closure - computes the administrativePartOf transitive closure
+    * part_of_closure_2ttl - writes the indirect administrativePartOf relations to a .ttl file
+"""
+import numpy as np
+import pandas as pd
+import shapely
+from rdflib import Graph, URIRef
+from rdflib.namespace import GEO
+
+from .s2_cell_integration import read_s2_cell_geometries
+from .terms import KWG_ONT, SF_CONTAINS, SF_OVERLAPS, SF_WITHIN
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _parse(infiles) -> Graph:
+    """Parses one or more .ttl files into a single RDFLib graph"""
+    kg = Graph()
+    for infile in [infiles] if isinstance(infiles, str) else infiles:
+        kg.parse(infile, format='turtle')
+    return kg
+
+
+def read_integration(infile: str) -> pd.DataFrame:
+    """Reads the sfWithin / sfOverlaps relations from S2 cells to regions from an S2 integration .ttl file
+
+    :param infile: path/filename of an S2 integration .ttl file (e.g., 's2_me_23_admin-regions_level-2.ttl')
+    :return: a DataFrame with columns s2, relation ('sfWithin' or 'sfOverlaps'), and region (full IRIs)
+    """
+    kg = _parse(infile)
+    rows = []
+    for relation in ['sfWithin', 'sfOverlaps']:
+        for s2, region in kg.subject_objects(URIRef(KWG_ONT + relation)):
+            if 's2.level' in str(s2) and 's2.level' not in str(region):
+                rows.append((str(s2), relation, str(region)))
+    return pd.DataFrame(rows, columns=['s2', 'relation', 'region'])
+
+
+def read_part_of(infiles) -> dict:
+    """Reads the administrativePartOf relations from one or more administrative region .ttl files
+
+    :param infiles: a path/filename or a list of paths/filenames of administrative region .ttl files
+    :return: a dictionary mapping each region IRI to the IRI of the region it is directly part of
+    """
+    kg = _parse(infiles)
+    return {str(s): str(o) for s, o in kg.subject_objects(URIRef(KWG_ONT + 'administrativePartOf'))}
+
+
+def read_region_geometries(infiles, regions: set = None) -> dict:
+    """Reads the default geometries of regions from one or more administrative region .ttl files
+
+    :param infiles: a path/filename or a list of paths/filenames of administrative region .ttl files
+    :param regions: an optional set of region IRIs to restrict the result to
+    :return: a dictionary mapping region IRIs to shapely geometries
+    """
+    kg = _parse(infiles)
+    geometries = {}
+    for region, geom in kg.subject_objects(GEO.defaultGeometry):
+        if regions is not None and str(region) not in regions:
+            continue
+        wkt = kg.value(geom, GEO.asWKT)
+        if wkt is not None:
+            wkt = str(wkt).strip()
+            if wkt.startswith('<'):  # drop a leading CRS IRI
+                wkt = wkt[wkt.index('>') + 1:].strip()
+            geometries[str(region)] = shapely.from_wkt(wkt)
+    return geometries
+
+
+def roll_up(df: pd.DataFrame, part_of: dict, parent_geometries: dict = None,
+            cell_geometries: dict = None) -> pd.DataFrame:
+    """Derives the S2 cell integration of parent regions from the S2 cell integration of their parts
+
+    :param df: a DataFrame of the finer integration (columns s2, relation, region) as from read_integration()
+    :param part_of: a dictionary mapping regions to their parent regions
+    :param parent_geometries: an optional dictionary mapping parent region IRIs to shapely geometries
+    :param cell_geometries: an optional dictionary mapping S2 cell IRIs to shapely geometries
+    :return: a DataFrame of the parent integration (columns s2, relation, region)
+    """
+    df = df.assign(region=df['region'].map(part_of)).dropna(subset=['region'])
+    df = df[['s2', 'region', 'relation']].drop_duplicates()
+    within = df.loc[df['relation'] == 'sfWithin', ['s2', 'region']].drop_duplicates()
+    candidates = df.loc[df['relation'] == 'sfOverlaps', ['s2', 'region']].drop_duplicates()
+    # A cell within any part of a parent is within the parent, so it is not an overlap candidate
+    candidates = candidates.merge(within, how='left', on=['s2', 'region'], indicator=True)
+    candidates = candidates.loc[candidates['_merge'] == 'left_only', ['s2', 'region']]
+    candidates['relation'] = 'sfOverlaps'
+    if parent_geometries and cell_geometries and not candidates.empty:
+        cells = np.array([cell_geometries.get(s2) for s2 in candidates['s2']], dtype=object)
+        parents = np.array([parent_geometries.get(r) for r in candidates['region']], dtype=object)
+        resolved = shapely.within(cells, parents)  # False where either geometry is missing
+        candidates.loc[resolved, 'relation'] = 'sfWithin'
+    within['relation'] = 'sfWithin'
+    return pd.concat([within, candidates], ignore_index=True)[['s2', 'relation', 'region']]
+
+
+def s2_cell_rollup_2ttl(integration_file: str, part_of_files, outfile: str, _PREFIX: dict,
+                        s2_file: str = None, region_files=None) -> None:
+    """Derives a coarser S2 cell integration from a finer one (e.g., state from county) and writes it to a .ttl file
+
+    :param integration_file: path/filename of the finer S2 integration .ttl file
+    :param part_of_files: path/filename(s) of the .ttl file(s) with the finer regions' administrativePartOf relations
+    :param outfile: path/filename for the output .ttl file
+    :param _PREFIX: a dictionary of project namespaces
+    :param s2_file: optional path/filename of the S2 cell .ttl file (cell geometries for resolving candidates)
+    :param region_files: optional path/filename(s) of the .ttl file(s) with the parent regions' geometries
+    :return: None
+    """
+    logger.info(f'Roll up the S2 cell integration in {integration_file}')
+    df = read_integration(integration_file)
+    part_of = read_part_of(part_of_files)
+    parent_geometries = cell_geometries = None
+    if s2_file and region_files:
+        parent_geometries = read_region_geometries(region_files, set(df['region'].map(part_of).dropna()))
+        gdf_cells = read_s2_cell_geometries(s2_file)
+        cell_geometries = dict(zip(gdf_cells['s2'], gdf_cells.geometry))
+    df_parent = roll_up(df, part_of, parent_geometries, cell_geometries)
+
+    kg = Graph()
+    for prefix in _PREFIX:
+        kg.bind(prefix, _PREFIX[prefix])
+    kwgr = str(_PREFIX['kwgr'])
+    for row in df_parent.itertuples():
+        s2_iri = _PREFIX['kwgr'][row.s2.replace(kwgr, '')]
+        region_iri = URIRef(row.region)
+        if row.relation == 'sfWithin':
+            # Create triples (within and its inverse, contains)
+            kg.add((s2_iri, SF_WITHIN, region_iri))
+            kg.add((region_iri, SF_CONTAINS, s2_iri))
+        else:
+            # Create triples (overlaps is reflexive)
+            kg.add((s2_iri, SF_OVERLAPS, region_iri))
+            kg.add((region_iri, SF_OVERLAPS, s2_iri))
+    logger.info(f'Write rolled up S2 cell integration triples to {outfile}')
+    kg.serialize(outfile, format='turtle')
+
+
+def part_of_closure(part_of: dict) -> dict:
+    """Computes the administrativePartOf transitive closure
+
+    :param part_of: a dictionary mapping regions to the regions they are directly part of
+    :return: a dictionary mapping each region to the list of all regions it is part of (nearest first)
+    """
+    closure = {}
+    for region in part_of:
+        ancestors = []
+        parent = part_of.get(region)
+        while parent is not None and parent not in ancestors and parent != region:
+            ancestors.append(parent)
+            parent = part_of.get(parent)
+        closure[region] = ancestors
+    return closure
+
+
+def part_of_closure_2ttl(part_of_files, outfile: str, _PREFIX: dict) -> None:
+    """Writes the indirect administrativePartOf relations (e.g., county subdivision -> state) to a .ttl file
+
+    :param part_of_files: a list of paths/filenames of administrative region .ttl files (all levels)
+    :param outfile: path/filename for the output .ttl file
+    :param _PREFIX: a dictionary of project namespaces
+    :return: None
+    """
+    closure = part_of_closure(read_part_of(part_of_files))
+    kg = Graph()
+    for prefix in _PREFIX:
+        kg.bind(prefix, _PREFIX[prefix])
+    for region, ancestors in closure.items():
+        for ancestor in ancestors[1:]:  # the direct relation is already in the region's own file
+            kg.add((URIRef(region), _PREFIX['kwg-ont']['administrativePartOf'], URIRef(ancestor)))
+    logger.info(f'Write administrativePartOf closure triples to {outfile}')
+    kg.serialize(outfile, format='turtle')
@@ -0,0 +1,227 @@
+"""S2 cells (Level 13) and their integration with states and counties
+
+The S2 cells that overlap or are within a state, and the S2 cell integration of the state's counties, are queried
+from KnowWhereGraph. The cells' Level 12 parents and touching cells are derived from the cell IDs
+(s2_cell_hierarchy), and the state's S2 cell integration is either queried from KWG or rolled up from the
+counties' integration (s2_cell_rollup).
+
+Required:
+    * rdflib (Literal)
+    * rdflib.namespace (GEO, RDF, RDFS, and XSD)
+    * logging
+
+Functions:
+    * state_s2_cells_2ttl - Queries KWG for the S2 cells that overlap or are within a given state (cell info)
+                            and derives their level 12 parents and touching cells from the cell IDs
+    * state_s2_cell_integration_2ttl - Queries KWG for the S2 cell integration info for a state (relations)
+    * county_s2_cell_integration_2ttl - Queries KWG for the S2 cell integration info for a state's counties (relations)
+    * state_s2_cell_rollup_2ttl - Derives the S2 cell integration for a state from its counties' S2 integration
+"""
+from rdflib import Literal
+from rdflib.namespace import GEO, RDF, RDFS, XSD
+
+import logging
+
+from .admin_regions import initial_kg
+from .config import KWG_RESOURCE, LEVEL1_OUTFILE, LEVEL1_OUTPATH, LEVEL2_OUTPATH, S2_OUTPATH
+from .fips import get_state_abbr, get_state_fips, get_state_identifiers
+from .kwg import kwg_batches, kwg_dataframe
+from .namespaces import get_prefixes
+from .s2_cell_hierarchy import add_within_triples, add_touches_triples
+from .s2_cell_rollup import s2_cell_rollup_2ttl
+from .terms import CELL_ID, S2_CELL_LEVEL13, SF_CONTAINS, SF_OVERLAPS, SF_WITHIN, iri_column, uris
+
+logger = logging.getLogger(__name__)
+
+
+def state_s2_cells_2ttl(name: str, endpoint: str, table: str) -> None:
+    """Given a state, SPARQL endpoint, and State-County-FIPS data table,
+          writes the S2 cells for the state from KWG as a .ttl file
+
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :param endpoint: KnowWhereGraph (KWG) SPARQL endpoint url
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    _PREFIX = get_prefixes()
+    # Get two-letter state abbreviaion, 2-digit state FIPS code, KWG IRI, and RDFLib IRI object
+    state_abbr, state_fips, state_query_iri, state_rdflib_iri = get_state_identifiers(table, name)
+
+    # Query to retrieve state S2 cells and their data
+    query_cells = """
+        PREFIX geo: <http://www.opengis.net/ont/geosparql#>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+        PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+        SELECT * WHERE {
+            ?s2 kwg-ont:sfOverlaps | kwg-ont:sfWithin """ + state_query_iri + """ ;
+            	rdf:type kwg-ont:S2Cell_Level13 ;
+            	rdfs:label ?label ;
+            	kwg-ont:cellID ?id ;
+            	geo:hasGeometry ?geom ;
+            	geo:hasMetricArea ?area .
+            ?geom rdfs:label ?glabel ;
+            	  geo:asWKT ?wkt .
+        }
+        """
+    # execute the query and return the results as a dataframe (cell IDs as uint64)
+    df_s2 = kwg_dataframe(endpoint, query_cells, cell_ids=['id'])
+    df_s2.drop_duplicates(inplace=True)
+
+    kg = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+    # Rewrite the IRI columns once (vectorized) and intern the cell / geometry IRIs
+    kwgr = str(_PREFIX['kwgr'])
+    s2_iris = uris(iri_column(df_s2['s2'], KWG_RESOURCE, kwgr))
+    geom_iris = uris(iri_column(df_s2['geom'], KWG_RESOURCE, kwgr))
+    id_texts = iri_column(df_s2['s2'], KWG_RESOURCE + 's2.level13.').tolist()
+    for s2_iri, geom_iri, cell_id, label, area, glabel, wkt in zip(s2_iris, geom_iris, id_texts,
+                                                                   df_s2['label'].tolist(), df_s2['area'].tolist(),
+                                                                   df_s2['glabel'].tolist(), df_s2['wkt'].tolist()):
+        # Create S2 triples
+        kg.add((s2_iri, RDF.type, S2_CELL_LEVEL13))
+        kg.add((s2_iri, RDFS.label, Literal(label, datatype=XSD.string)))
+        kg.add((s2_iri, CELL_ID, Literal(cell_id, datatype=XSD.integer)))
+
+        # Create S2 geometry triples
+        kg.add((s2_iri, GEO.defaultGeometry, geom_iri))
+        kg.add((s2_iri, GEO.hasGeometry, geom_iri))
+        kg.add((s2_iri, GEO.hasMetricArea, Literal(area, datatype=XSD.float)))
+        kg.add((geom_iri, RDF.type, GEO.Geometry))
+        kg.add((geom_iri, RDFS.label, Literal(glabel, datatype=XSD.string)))
+        kg.add((geom_iri, GEO.asWKT, Literal(wkt, datatype=GEO.wktLiteral)))
+
+    # Derive the level 12 parents (sfWithin / sfContains) and the touching cells (sfTouches) from the cell IDs
+    cell_ids = df_s2['id'].to_numpy()
+    add_within_triples(kg, cell_ids, 12, _PREFIX)
+    add_touches_triples(kg, cell_ids, _PREFIX)
+
+    # Write the completed KG to a .ttl file
+    kg.serialize(S2_OUTPATH + state_abbr + '_' + state_fips + '_s2-l13.ttl', format='turtle')
+
+
+def state_s2_cell_integration_2ttl(name: str, endpoint: str, table: str) -> None:
+    """Given a state, SPARQL endpoint, and State-County-FIPS data table,
+          writes the S2 cell integration for the state from KWG as a .ttl file
+
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :param endpoint: KnowWhereGraph (KWG) SPARQL endpoint url
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    _PREFIX = get_prefixes()
+    # Create IRIs
+    state_abbr, state_fips, state_query_iri, state_rdflib_iri = get_state_identifiers(table, name)
+
+    # Query to find S2 cells within a given state's boundary
+    query_within = """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+        PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+        SELECT * WHERE {
+            ?s2 kwg-ont:sfWithin """ + state_query_iri + """ ;
+            	rdf:type kwg-ont:S2Cell_Level13 .
+        }
+        """
+
+    # Query to find S2 cells overlapping a given state's boundary
+    query_overlaps = """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+        PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+        SELECT * WHERE {
+            ?s2 kwg-ont:sfOverlaps """ + state_query_iri + """ ;
+            	rdf:type kwg-ont:S2Cell_Level13 .
+        }
+        """
+
+    kg = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+    kwgr = str(_PREFIX['kwgr'])
+    # execute the queries and read the results in batches of rows as they arrive
+    for batch in kwg_batches(endpoint, query_within):
+        for s2_iri in uris(iri_column(batch['s2'], KWG_RESOURCE, kwgr)):
+            # Create triples (within and its inverse, contains)
+            kg.add((s2_iri, SF_WITHIN, state_rdflib_iri))
+            kg.add((state_rdflib_iri, SF_CONTAINS, s2_iri))
+
+    for batch in kwg_batches(endpoint, query_overlaps):
+        for s2_iri in uris(iri_column(batch['s2'], KWG_RESOURCE, kwgr)):
+            # Create triples (overlaps is reflexive)
+            kg.add((s2_iri, SF_OVERLAPS, state_rdflib_iri))
+            kg.add((state_rdflib_iri, SF_OVERLAPS, s2_iri))
+
+    # Write the completed KG to a .ttl file
+    kg.serialize(LEVEL1_OUTPATH + 's2_' + state_abbr + '_' + state_fips + '_admin-regions_level-1.ttl',
+                 format='turtle')
+
+
+def county_s2_cell_integration_2ttl(name: str, endpoint: str, table: str) -> None:
+    """Given a state, SPARQL endpoint, and State-County-FIPS data table,
+          writes the S2 cell integration for the state's counties from KWG as a .ttl file
+
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :param endpoint: KnowWhereGraph (KWG) SPARQL endpoint url
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    _PREFIX = get_prefixes()
+    # Create IRIs
+    state_abbr, state_fips, state_query_iri, state_rdflib_iri = get_state_identifiers(table, name)
+    kg = initial_kg(_PREFIX)  # Create an empty Graph() with SAWGraph namespaces
+    kwgr = str(_PREFIX['kwgr'])
+    # One query per relation for all of the state's counties (rather than two per county); ?county repeats
+    #    on every row, so it is read as a categorical and each county IRI is created once per batch
+    for relation in ['sfWithin', 'sfOverlaps']:
+        query = """
+                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+                PREFIX kwg-ont: <http://stko-kwg.geog.ucsb.edu/lod/ontology/>
+                PREFIX kwgr: <http://stko-kwg.geog.ucsb.edu/lod/resource/>
+
+                SELECT ?s2 ?county WHERE {
+                    ?county kwg-ont:administrativePartOf """ + state_query_iri + """ ;
+                            rdf:type kwg-ont:AdministrativeRegion_2 .
+                    ?s2 kwg-ont:""" + relation + """ ?county ;
+                        rdf:type kwg-ont:S2Cell_Level13 .
+                }
+                """
+        # execute the query and read the results in batches of rows as they arrive
+        for batch in kwg_batches(endpoint, query, categories=['county']):
+            s2_iris = uris(iri_column(batch['s2'], KWG_RESOURCE, kwgr))
+            county_iris = uris(iri_column(batch['county'], KWG_RESOURCE, kwgr))
+            for s2_iri, county_rdflib_iri in zip(s2_iris, county_iris):
+                if relation == 'sfWithin':
+                    # Create triples (within and its inverse, contains)
+                    kg.add((s2_iri, SF_WITHIN, county_rdflib_iri))
+                    kg.add((county_rdflib_iri, SF_CONTAINS, s2_iri))
+                else:
+                    # Create triples (overlaps is reflexive)
+                    kg.add((s2_iri, SF_OVERLAPS, county_rdflib_iri))
+                    kg.add((county_rdflib_iri, SF_OVERLAPS, s2_iri))
+
+    # Write the completed KG to a .ttl file
+    kg.serialize(LEVEL2_OUTPATH + 's2_' + state_abbr + '_' + state_fips + '_admin-regions_level-2.ttl',
+                 format='turtle')
+
+
+def state_s2_cell_rollup_2ttl(name: str, table: str) -> None:
+    """Given a state's proper name and a State-County-FIPS data table, derives the S2 cell integration for
+          the state from the S2 cell integration of its counties and writes it as a .ttl file
+
+    Requires the state's S2 cell file, the state's county S2 integration file, the state's county file
+    (admin_regions_level2_2ttl), and the US states file (admin_regions_level1_2ttl).
+
+    :param name: a string of a state's proper name (e.g., 'Alabama')
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    abbr = get_state_abbr(table, name).lower()
+    fips = get_state_fips(table, name)
+    county_integration = LEVEL2_OUTPATH + 's2_' + abbr + '_' + fips + '_admin-regions_level-2.ttl'
+    counties = LEVEL2_OUTPATH + abbr + '_' + fips + '_admin-regions_level-2.ttl'
+    states = LEVEL1_OUTFILE
+    s2_cells = S2_OUTPATH + abbr + '_' + fips + '_s2-l13.ttl'
+    output = LEVEL1_OUTPATH + 's2_' + abbr + '_' + fips + '_admin-regions_level-1.ttl'
+    s2_cell_rollup_2ttl(county_integration, counties, output, get_prefixes(), s2_file=s2_cells, region_files=states)
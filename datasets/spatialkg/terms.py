@@ -0,0 +1,86 @@
+"""Shared RDFLib term factory for the triple generation loops
+
+The ..._2ttl functions build the same terms over and over: the namespace of every IRI in a query result is
+stripped with str.replace() (often several times per row), the same S2 cell and region IRIs are rebuilt for
+every relation they take part in, and every predicate is looked up in _PREFIX for every triple. Instead:
+    * IRI columns are rewritten once per DataFrame with vectorized string operations (iri_column), and
+    * IRIs are interned in a bounded cache (uri), so each distinct IRI is created once and shared by all of its
+      triples; predicates and classes are module constants.
+
+Required:
+    * pandas
+    * rdflib (URIRef)
+    * functools
+
+Functions:
+    * iri_column - rewrites a column of IRIs from one namespace to another (or to local names)
+    * uri - returns the interned URIRef for an IRI
+    * uris - converts a column or list of IRIs to a list of interned URIRefs
+    * clear_cache - empties the interning cache
+"""
+from functools import lru_cache
+
+import pandas as pd
+from rdflib import URIRef
+
+# The maximum number of interned IRIs (about the number of level 13 S2 cells in a large state)
+CACHE_SIZE = 1 << 20
+
+KWG_ONT = 'http://stko-kwg.geog.ucsb.edu/lod/ontology/'
+
+# Predicates and classes used by the S2 cell and administrative region loops
+SF_WITHIN = URIRef(KWG_ONT + 'sfWithin')
+SF_CONTAINS = URIRef(KWG_ONT + 'sfContains')
+SF_OVERLAPS = URIRef(KWG_ONT + 'sfOverlaps')
+SF_TOUCHES = URIRef(KWG_ONT + 'sfTouches')
+CELL_ID = URIRef(KWG_ONT + 'cellID')
+S2_CELL_LEVEL13 = URIRef(KWG_ONT + 'S2Cell_Level13')
+
+
+def iri_column(column: pd.Series, old_namespace: str, new_namespace: str = '') -> pd.Series:
+    """Rewrites a column of IRIs from one namespace to another with vectorized string operations
+
+    A categorical column is rewritten by its categories only and stays categorical.
+
+    :param column: a Series of IRIs as strings (e.g., the ?s2 column of a KWG query result)
+    :param old_namespace: the namespace (or any prefix) to remove (e.g., KWG_RESOURCE + 's2.level13.')
+    :param new_namespace: the namespace to prepend (e.g., str(_PREFIX['kwgr'])); '' to return local names
+    :return: a Series of rewritten IRIs (or local names)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = iri_column(pd.Series(column.cat.categories), old_namespace, new_namespace)
+        return column.cat.rename_categories(categories.tolist())
+    local_names = column.astype(str).str.removeprefix(old_namespace)
+    return new_namespace + local_names if new_namespace else local_names
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def uri(iri: str) -> URIRef:
+    """Returns the interned URIRef for an IRI
+
+    :param iri: an IRI as a string
+    :return: an RDFLib URIRef (the same object for every call with the same IRI while it is cached)
+    """
+    return URIRef(iri)
+
+
+def uris(iris) -> list:
+    """Converts a column or list of IRIs to a list of interned URIRefs
+
+    :param iris: a Series (strings or categorical) or iterable of IRIs as strings
+    :return: a list of RDFLib URIRefs
+    :raises ValueError: if a categorical Series has missing values
+    """
+    if isinstance(iris, pd.Series) and isinstance(iris.dtype, pd.CategoricalDtype):
+        codes = iris.cat.codes.tolist()
+        if -1 in codes:
+            # A missing value has code -1, which would silently index the last category
+            raise ValueError(f'{codes.count(-1)} missing IRI(s) in column {iris.name!r}')
+        terms = uris(iris.cat.categories)  # One URIRef per category, shared by all of its rows
+        return [terms[code] for code in codes]
+    return [uri(iri) for iri in (iris.tolist() if isinstance(iris, pd.Series) else iris)]
+
+
+def clear_cache() -> None:
+    """Empties the interning cache (e.g., between jobs in a long-running worker)"""
+    uri.cache_clear()
@@ -0,0 +1,211 @@
+"""Read Turtle and N-Triples files statement by statement without building a graph
+
+The .ttl files written by the dataset scripts (RDFLib's Turtle serializer and the class statement writers) put
+each statement on its own line(s) ending in ' .'. Reading them one statement at a time keeps memory flat no
+matter the size of the file, which RDFLib's parser (which builds the whole graph) does not.
+
+Supported: @prefix / PREFIX directives, IRIs, prefixed names, 'a', literals (with language tags or datatypes,
+including triple-quoted literals), numbers, booleans, blank node labels, and empty anonymous blank nodes ('[ ]').
+Blank node property lists ('[ p o ]') and collections ('( )') are not supported (none of the dataset scripts
+write them). Relative IRIs are not resolved.
+
+Terms are returned as plain strings (IRIs and blank node labels, e.g. 'http://...' and '_:b0') or, for
+literals, as (lexical form, datatype IRI or None, language tag or None) tuples.
+
+Functions:
+    * read_statements - splits a file into directives and statements
+    * parse_statement - parses one statement into (subject, predicate, object) triples
+    * read_triples - yields the triples of a file, one statement at a time
+    * nt_term - returns a term in N-Triples syntax
+"""
+import itertools
+import re
+
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+
+_PNAME = r'(?:[A-Za-z][\w.-]*)?:(?:[\w:%-]|\.(?=[\w:%-]))*'
+_TOKEN = re.compile(r'''
+      (?P<ws>\s+|\#[^\n]*)
+    | (?P<iri><[^>\s]*>)
+    | (?P<literal>(?:"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\'
+                    |"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+                  (?:@[A-Za-z]+(?:-[A-Za-z0-9]+)*|\^\^(?:<[^>\s]*>|''' + _PNAME + r'''))?)
+    | (?P<bnode>_:[\w-]+(?:\.[\w-]+)*)
+    | (?P<number>[+-]?(?:\d*\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+|\d+))
+    | (?P<boolean>(?:true|false)(?![\w:.-]))
+    | (?P<a>a(?=[\s<"']))
+    | (?P<pname>''' + _PNAME + r''')
+    | (?P<anon>\[\s*\])
+    | (?P<punct>[;,.\[\]()])
+''', re.VERBOSE)
+_DIRECTIVE = re.compile(r'^\s*(@prefix|prefix)\s+([\w.-]*):\s*<([^>]*)>\s*\.?\s*$', re.IGNORECASE)
+_BASE = re.compile(r'^\s*(@base|base)\s', re.IGNORECASE)
+_ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_ANON = itertools.count()
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def read_statements(infile: str):
+    """Splits a Turtle or N-Triples file into directives and statements
+
+    A statement ends at a line ending in '.' outside of a triple-quoted literal.
+
+    :param infile: path/filename of a .ttl or .nt file
+    :return: a generator of (kind, text) tuples, where kind is 'directive' or 'statement'
+    """
+    statement = []
+    in_long_literal = False
+    with open(infile, 'r', encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if not in_long_literal and not statement:
+                if _DIRECTIVE.match(stripped) or _BASE.match(stripped):
+                    yield 'directive', line
+                    continue
+                if not stripped or stripped.startswith('#'):
+                    continue
+            statement.append(line)
+            if (line.count('"""') + line.count("'''")) % 2:
+                in_long_literal = not in_long_literal
+            if not in_long_literal and stripped.endswith('.'):
+                yield 'statement', ''.join(statement)
+                statement = []
+    if statement:
+        yield 'statement', ''.join(statement)
+
+
+def _unescape_match(m) -> str:
+    code = m.group(1)
+    return _ESCAPES.get(code, '') if len(code) == 1 else chr(int(code[1:], 16))
+
+
+def _unescape(text: str) -> str:
+    return _ESCAPE.sub(_unescape_match, text) if '\\' in text else text
+
+
+def _expand(pname: str, prefixes: dict) -> str:
+    prefix, local = pname.split(':', 1)
+    if prefix not in prefixes:
+        raise ValueError(f'Undefined prefix: {prefix}:')
+    return prefixes[prefix] + local.replace('\\', '')
+
+
+def _term(kind: str, text: str, prefixes: dict):
+    """Converts a token to a term (an IRI / blank node string or a literal tuple)"""
+    if kind == 'iri':
+        return _unescape(text[1:-1])
+    if kind == 'pname':
+        return _expand(text, prefixes)
+    if kind == 'bnode':
+        return text
+    if kind == 'anon':
+        return '_:anon' + str(next(_ANON))
+    if kind == 'a':
+        return RDF_TYPE
+    if kind == 'number':
+        if 'e' in text.lower():
+            return text, XSD + 'double', None
+        return text, XSD + ('decimal' if '.' in text else 'integer'), None
+    if kind == 'boolean':
+        return text, XSD + 'boolean', None
+    # Literal: find the closing quote(s) from the end of the lexical form
+    quote = text[:3] if text[:3] in ('"""', "'''") else text[0]
+    end = text.rindex(quote)
+    lexical = _unescape(text[len(quote):end])
+    suffix = text[end + len(quote):]
+    if suffix.startswith('@'):
+        return lexical, None, suffix[1:].lower()
+    if suffix.startswith('^^'):
+        datatype = suffix[2:]
+        return lexical, _unescape(datatype[1:-1]) if datatype.startswith('<') else _expand(datatype, prefixes), None
+    return lexical, None, None
+
+
+def parse_statement(text: str, prefixes: dict) -> list:
+    """Parses one statement (subject and predicate-object lists) into triples
+
+    :param text: the text of a statement (from read_statements)
+    :param prefixes: a dictionary of prefix -> namespace IRI
+    :return: a list of (subject, predicate, object) triples
+    :raises ValueError: if the statement is not (supported) Turtle
+    """
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            raise ValueError(f'Unexpected text: {text[pos:pos + 40]!r}')
+        pos = m.end()
+        if m.lastgroup != 'ws':
+            tokens.append((m.lastgroup, m.group()))
+    if len(tokens) < 4 or tokens[-1] != ('punct', '.'):
+        raise ValueError(f'Incomplete statement: {text[:80]!r}')
+    triples = []
+    subject = predicate = None
+    expect = 'subject'
+    for kind, value in tokens[:-1]:
+        if kind == 'punct':
+            if value == ';' and expect in ('separator', 'predicate'):
+                expect = 'predicate'
+            elif value == ',' and expect == 'separator':
+                expect = 'object'
+            else:
+                raise ValueError(f'Unsupported or unexpected {value!r} in: {text[:80]!r}')
+        elif expect == 'subject' and kind in ('iri', 'pname', 'bnode', 'anon'):
+            subject = _term(kind, value, prefixes)
+            expect = 'predicate'
+        elif expect == 'predicate' and kind in ('iri', 'pname', 'a'):
+            predicate = _term(kind, value, prefixes)
+            expect = 'object'
+        elif expect == 'object' and kind != 'a':
+            triples.append((subject, predicate, _term(kind, value, prefixes)))
+            expect = 'separator'
+        else:
+            raise ValueError(f'Unexpected {value!r} in: {text[:80]!r}')
+    if expect not in ('separator', 'predicate') or not triples:
+        raise ValueError(f'Incomplete statement: {text[:80]!r}')
+    return triples
+
+
+def read_triples(infile: str, prefixes: dict = None, errors: list = None):
+    """Yields the triples of a Turtle or N-Triples file, one statement at a time
+
+    :param infile: path/filename of a .ttl or .nt file
+    :param prefixes: a dictionary of prefix -> namespace IRI to start with (updated by the file's directives)
+    :param errors: a list to append (statement text, error message) tuples to instead of raising ValueError
+    :return: a generator of (subject, predicate, object) triples
+    """
+    prefixes = {} if prefixes is None else prefixes
+    for kind, text in read_statements(infile):
+        if kind == 'directive':
+            m = _DIRECTIVE.match(text.strip())
+            if m:
+                prefixes[m.group(2)] = m.group(3)
+            continue
+        try:
+            triples = parse_statement(text, prefixes)
+        except ValueError as e:
+            if errors is None:
+                raise
+            errors.append((text, str(e)))
+            continue
+        yield from triples
+
+
+def _escape(lexical: str) -> str:
+    return lexical.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def nt_term(term) -> str:
+    """Returns a term (as returned by read_triples) in N-Triples syntax
+
+    :param term: an IRI or blank node label as a string, or a literal as a (lexical form, datatype, language) tuple
+    :return: the term in N-Triples syntax (e.g., '<http://...>', '_:b0', or '"12"^^<http://...#integer>')
+    """
+    if isinstance(term, tuple):
+        lexical, datatype, language = term
+        if language:
+            return f'"{_escape(lexical)}"@{language}'
+        return f'"{_escape(lexical)}"^^<{datatype}>' if datatype else f'"{_escape(lexical)}"'
+    return term if term.startswith('_:') else f'<{term}>'
@@ -0,0 +1,298 @@
+"""Upload .ttl files to a triple store with the SPARQL 1.1 Graph Store Protocol, in parallel chunks
+
+Instead of one POST per (possibly multi-GB) file, each file is split into chunks of complete Turtle statements
+(each chunk repeats the file's prefixes, so it is a valid Turtle document on its own) and the chunks are POSTed
+to the store's Graph Store Protocol endpoint over several connections at once. POST merges a chunk into the
+target graph, so the chunks of a file can arrive in any order. Failed chunks (connection errors, 429, and 5xx
+responses) are retried with exponential backoff.
+
+A loader accepts files while it is uploading, so .ttl files can be queued as soon as they are written and
+uploaded while the next file is being generated (see spatialkg.worker, jobs with "upload": true). Each state is
+loaded into its own named graph (see state_graph_iri).
+
+A local stand-in store (start_stand_in_store) accepts Graph Store Protocol POSTs into an in-memory RDFLib
+dataset, optionally failing a share of the requests, for trying out uploads without a triple store.
+
+Under ### State ###, define
+    the state's two-letter abbreviation in lower case and
+    the state's 2-digit FIPS code as a string
+Under ### Upload ###, define
+    the number of parallel connections
+    the maximum size of a chunk in bytes
+    the number of retries of a failed chunk
+
+Required:
+    * requests
+    * rdflib (Dataset and URIRef) - only for the stand-in store
+    * datetime, glob, http.server, logging, os, queue, random, threading, time, urllib
+
+Classes:
+    * GraphStoreLoader - uploads queued .ttl files in chunks over parallel connections
+
+Functions:
+    * turtle_chunks - splits a .ttl file into chunks of complete statements
+    * state_graph_iri - returns the IRI of a state's named graph
+    * state_output_files - returns a state's .ttl files under ttl_files/ (optionally only recently written ones)
+    * upload_files - uploads .ttl files and waits for the upload to finish
+    * start_stand_in_store - starts a local in-memory Graph Store Protocol endpoint for testing
+"""
+import datetime
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+
+from .config import GRAPH_BASE, STORE_ENDPOINT
+from .turtle import read_statements
+
+### State ###
+state_abbr = 'me'
+state_fips = '23'
+
+### Upload ###
+connections = 4
+chunk_bytes = 8 * 1024 * 1024
+retries = 3
+
+logger = logging.getLogger(__name__)
+
+
+def turtle_chunks(infile: str, max_bytes: int = 8 * 1024 * 1024):
+    """Splits a .ttl file into chunks of complete statements, each starting with the file's prefixes
+
+    Statements are found with spatialkg.turtle.read_statements; a statement larger than max_bytes is its own chunk.
+
+    :param infile: path/filename of a .ttl file
+    :param max_bytes: the (approximate) maximum size of a chunk in bytes
+    :return: a generator of chunks (strings)
+    """
+    header, chunk = [], []
+    size = 0
+    for kind, text in read_statements(infile):
+        if kind == 'directive':
+            header.append(text)  # Directives apply to the rest of the file, so every later chunk repeats them
+            continue
+        if chunk and size + len(text) > max_bytes:
+            yield ''.join(header + ['\n'] + chunk)
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text)
+    if chunk:
+        yield ''.join(header + ['\n'] + chunk)
+
+
+def state_graph_iri(abbr: str, fips: str, base: str = GRAPH_BASE) -> str:
+    """Returns the IRI of the named graph for a state's triples
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :param base: the base IRI of the named graphs
+    :return: the named graph IRI (e.g., '<base>al_01')
+    """
+    return base + abbr.lower() + '_' + fips
+
+
+def state_output_files(abbr: str, fips: str, since: float = None) -> list:
+    """Returns the .ttl files for a state under ttl_files/ (e.g., al_01_s2-l13.ttl, s2_al_01_admin-regions_level-2.ttl)
+
+    :param abbr: A state's two-letter abbreviation (e.g., 'AL' or 'Al' or 'al')
+    :param fips: A state's 2-digit FIPS code as a string (e.g., '01')
+    :param since: if given, only files modified at or after this time (seconds since the epoch)
+    :return: a sorted list of paths/filenames
+    """
+    files = [f for f in glob.glob('ttl_files/*/*' + abbr.lower() + '_' + fips + '_*.ttl')
+             if since is None or os.path.getmtime(f) >= since]
+    return sorted(files)
+
+
+class GraphStoreLoader:
+    """Uploads queued .ttl files to a Graph Store Protocol endpoint in chunks over parallel connections
+
+    One thread splits the queued files into chunks and puts them in a bounded queue (so at most a few chunks per
+    connection are in memory); one thread per connection POSTs chunks with its own HTTP session. Use as a
+    context manager, or call start() and close().
+
+    :param endpoint: the Graph Store Protocol endpoint URL
+    :param connections: the number of parallel connections
+    :param max_bytes: the (approximate) maximum size of a chunk in bytes
+    :param retries: the number of retries of a failed chunk
+    :param backoff: seconds to wait before the first retry (doubled for each further retry)
+    """
+
+    def __init__(self, endpoint: str = STORE_ENDPOINT, connections: int = 4, max_bytes: int = 8 * 1024 * 1024,
+                 retries: int = 3, backoff: float = 1.0):
+        self.endpoint = endpoint
+        self.connections = connections
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {'files': 0, 'chunks': 0, 'bytes': 0, 'retries': 0, 'failed': []}
+        self._files = queue.Queue()
+        self._chunks = queue.Queue(maxsize=2 * connections)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        """Starts the chunking thread and one upload thread per connection"""
+        self._threads = [threading.Thread(target=self._chunk_files, daemon=True)]
+        self._threads += [threading.Thread(target=self._upload_chunks, daemon=True) for _ in range(self.connections)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def add_file(self, infile: str, graph: str = None) -> None:
+        """Queues a .ttl file for upload (returns immediately)
+
+        :param infile: path/filename of a .ttl file
+        :param graph: the IRI of the named graph to load the file into (None for the default graph)
+        :return: None
+        """
+        self._files.put((infile, graph))
+
+    def close(self) -> dict:
+        """Waits for all queued files to be uploaded and stops the threads
+
+        :return: a dictionary of upload statistics (files, chunks, bytes, retries, and failed chunks as
+                 (file, chunk number, error) tuples; the chunk number is None if the file could not be read)
+        """
+        self._files.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        return self.stats
+
+    def _chunk_files(self) -> None:
+        try:
+            while (item := self._files.get()) is not None:
+                infile, graph = item
+                logger.info(f'Upload {infile} to graph {graph}')
+                try:
+                    for n, chunk in enumerate(turtle_chunks(infile, self.max_bytes)):
+                        self._chunks.put((infile, n, graph, chunk.encode('utf-8')))
+                except (OSError, UnicodeDecodeError) as e:
+                    # Chunks already queued are still uploaded; the rest of the file is recorded as failed
+                    logger.error(f'Reading {infile} failed: {e!r}')
+                    with self._lock:
+                        self.stats['failed'].append((infile, None, repr(e)))
+                    continue
+                with self._lock:
+                    self.stats['files'] += 1
+        finally:
+            # Always stop the upload threads, or close() would wait for them forever
+            for _ in range(self.connections):
+                self._chunks.put(None)
+
+    def _upload_chunks(self) -> None:
+        import requests
+        session = requests.Session()
+        while (item := self._chunks.get()) is not None:
+            infile, n, graph, data = item
+            params = {'graph': graph} if graph else {'default': ''}
+            error = None
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                    with self._lock:
+                        self.stats['retries'] += 1
+                try:
+                    response = session.post(self.endpoint, params=params, data=data,
+                                            headers={'Content-Type': 'text/turtle; charset=utf-8'})
+                except requests.RequestException as e:
+                    error = repr(e)
+                    continue
+                if response.ok:
+                    error = None
+                    break
+                error = f'HTTP {response.status_code}: {response.text[:200]}'
+                if response.status_code != 429 and response.status_code < 500:
+                    break  # The chunk was rejected; retrying will not help
+            with self._lock:
+                if error:
+                    logger.error(f'Chunk {n} of {infile} failed: {error}')
+                    self.stats['failed'].append((infile, n, error))
+                else:
+                    self.stats['chunks'] += 1
+                    self.stats['bytes'] += len(data)
+
+
+def upload_files(files: dict, endpoint: str = STORE_ENDPOINT, connections: int = 4,
+                 max_bytes: int = 8 * 1024 * 1024, retries: int = 3) -> dict:
+    """Uploads .ttl files in parallel chunks and waits for the upload to finish
+
+    :param files: a dictionary of path/filename -> named graph IRI (None for the default graph)
+    :param endpoint: the Graph Store Protocol endpoint URL
+    :param connections: the number of parallel connections
+    :param max_bytes: the (approximate) maximum size of a chunk in bytes
+    :param retries: the number of retries of a failed chunk
+    :return: a dictionary of upload statistics (files, chunks, bytes, retries, and failed chunks)
+    """
+    with GraphStoreLoader(endpoint, connections, max_bytes, retries) as loader:
+        for infile, graph in files.items():
+            loader.add_file(infile, graph)
+    return loader.stats
+
+
+def start_stand_in_store(port: int = 0, fail_rate: float = 0.0) -> tuple:
+    """Starts a local Graph Store Protocol endpoint that loads POSTed Turtle into an in-memory RDFLib dataset
+
+    :param port: the port to listen on (0 for any free port)
+    :param fail_rate: the share of requests (0-1) to answer with HTTP 503 (to exercise retries)
+    :return: the endpoint URL, the RDFLib Dataset, and the server (call server.shutdown() to stop it)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+    import random
+    from rdflib import Dataset, URIRef
+
+    dataset = Dataset()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            graph = parse_qs(urlparse(self.path).query).get('graph', [None])[0]
+            try:
+                with lock:
+                    target = dataset.graph(URIRef(graph)) if graph else dataset.default_graph
+                    target.parse(data=data.decode('utf-8'), format='turtle')
+                self.send_response(204)
+            except Exception:
+                self.send_response(400)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/', dataset, server
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_upload.txt')
+    start_time = time.time()
+    graph_iri = state_graph_iri(state_abbr, state_fips)
+    logger.info(f'Launching script: upload {state_abbr}_{state_fips} to {STORE_ENDPOINT} graph {graph_iri}')
+    upload_stats = upload_files({f: graph_iri for f in state_output_files(state_abbr, state_fips)},
+                                STORE_ENDPOINT, connections, chunk_bytes, retries)
+    logger.info(f'Upload: {upload_stats}')
+    print(f"{upload_stats['files']} files, {upload_stats['chunks']} chunks, {upload_stats['bytes']} bytes uploaded; "
+          f"{upload_stats['retries']} retries, {len(upload_stats['failed'])} failed chunks")
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
@@ -0,0 +1,211 @@
+"""Validate the structure of generated .ttl (or .nt) files in a single streaming pass
+
+Loading an S2 cell file into RDFLib to check it takes longer (and far more memory) than generating it. The
+validator reads files one statement at a time (spatialkg.turtle) and keeps only what it needs to match triples
+across statements, as 64-bit hashes (examples are only kept for the first 1000 items of each kind):
+    * features (subjects with geo:hasGeometry or geo:defaultGeometry) have exactly one geo:defaultGeometry
+    * every kwg-ont:sfWithin has its kwg-ont:sfContains inverse (and vice versa)
+    * geo:asWKT literals parse (an optional CRS IRI prefix is allowed)
+    * kwg-ont:cellID matches the cell ID (and level) in the S2 cell IRI (e.g., kwgr:s2.level13.<cellID>)
+    * features and S2 cells have an rdf:type, and, if class statement files are given, every S2 cell and
+      administrative region class statement in the data files is in the class statement files
+Files that belong together (e.g., a state's S2 cell file and its class statements) are validated together, so
+inverses and class statements may be in another of the files.
+
+Under ### Input Files ###, define
+    the list of paths/filenames of the .ttl files to validate
+    the list of paths/filenames of the matching class statement .ttl files (or an empty list)
+
+Required:
+    * shapely
+    * datetime, logging, re, sys, time
+
+Functions:
+    * validate_files - validates one or more files and returns the error counts and examples
+    * write_report - prints (and logs) a validation report
+"""
+import shapely
+
+import datetime
+import logging
+import re
+import sys
+import time
+
+from .s2_cell_ranges import cell_level
+from .terms import KWG_ONT
+from .turtle import RDF_TYPE, read_triples
+
+### Input Files ###
+ttl_files = ['ttl_files/S2_cells/me_23_s2-l13.ttl']
+class_statement_files = ['ttl_files/class_statements/me_23_s2-l13_class-statements.ttl']
+
+GEO = 'http://www.opengis.net/ont/geosparql#'
+HAS_GEOMETRY = GEO + 'hasGeometry'
+DEFAULT_GEOMETRY = GEO + 'defaultGeometry'
+AS_WKT = GEO + 'asWKT'
+CELL_ID = KWG_ONT + 'cellID'
+SF_WITHIN = KWG_ONT + 'sfWithin'
+SF_CONTAINS = KWG_ONT + 'sfContains'
+_CELL_IRI = re.compile(r's2\.level(\d+)\.(\d+)$')
+_CLASS = re.compile(re.escape(KWG_ONT) + r'(S2Cell_Level\d+|AdministrativeRegion_\d+)$')
+_CRS = re.compile(r'^\s*<[^>]*>\s*')
+
+# Check -> description (in report order)
+CHECKS = {
+    'syntax': 'statements that could not be parsed',
+    'default_geometry_missing': 'features without a geo:defaultGeometry',
+    'default_geometry_multiple': 'features with more than one geo:defaultGeometry',
+    'within_without_contains': 'sfWithin triples without the inverse sfContains',
+    'contains_without_within': 'sfContains triples without the inverse sfWithin',
+    'wkt_invalid': 'geo:asWKT literals that do not parse',
+    'cell_id_mismatch': 'kwg-ont:cellID values that do not match the S2 cell IRI',
+    'type_missing': 'features and S2 cells without an rdf:type',
+    'class_statement_missing': 'class statements missing from the class statement files',
+}
+
+# The number of WKT literals parsed at once
+WKT_BATCH = 10000
+
+logger = logging.getLogger(__name__)
+
+
+def _remember(examples: dict, key: int, value: str, limit: int) -> None:
+    """Keeps the text of the first few items of a hashed set so that errors can be reported with examples"""
+    if len(examples) < limit:
+        examples[key] = value
+
+
+def _check_wkt(batch: list, errors: dict, examples: dict, max_examples: int) -> None:
+    """Parses a batch of (subject, WKT) pairs and counts the literals that do not parse"""
+    geometries = shapely.from_wkt([_CRS.sub('', wkt) for _, wkt in batch], on_invalid='ignore')
+    for (s, wkt), geometry in zip(batch, geometries):
+        if geometry is None:
+            errors['wkt_invalid'] += 1
+            if len(examples['wkt_invalid']) < max_examples:
+                examples['wkt_invalid'].append(f'{s}: {wkt[:80]}')
+    batch.clear()
+
+
+def validate_files(infiles: list, class_files: list = None, max_examples: int = 5) -> dict:
+    """Validates one or more .ttl / .nt files in a single streaming pass
+
+    :param infiles: path/filename(s) of the .ttl or .nt files to validate (validated together)
+    :param class_files: optional path/filename(s) of the class statement files for the infiles
+    :param max_examples: the number of examples to keep for each check
+    :return: a dictionary with the number of 'files' and 'triples', the 'errors' (check -> count),
+             and 'examples' (check -> list of strings)
+    """
+    infiles = [infiles] if isinstance(infiles, str) else list(infiles)
+    class_files = [class_files] if isinstance(class_files, str) else list(class_files or [])
+    errors = dict.fromkeys(CHECKS, 0)
+    examples = {check: [] for check in CHECKS}
+    n_triples = 0
+    default_geometries = {}  # hash(feature) -> number of geo:defaultGeometry
+    geo_features, cells, typed = set(), set(), set()  # hashes of features, S2 cells, and subjects with an rdf:type
+    names = {}  # hash -> IRI of the first features and cells (for examples)
+    within, contains = {}, {}  # hash((part, whole)) -> example text or None, for unmatched pairs only
+    class_pairs, class_statements = {}, set()  # hashes of (instance, class) pairs in the data / class files
+    wkt_batch = []
+
+    for infile in infiles + class_files:
+        in_class_file = infile in class_files and infile not in infiles
+        syntax_errors = []
+        for s, p, o in read_triples(infile, errors=syntax_errors):
+            n_triples += 1
+            if p == RDF_TYPE:
+                typed.add(hash(s))
+                if isinstance(o, str) and _CLASS.match(o):
+                    key = hash((s, o))
+                    if in_class_file:
+                        class_statements.add(key)
+                    else:
+                        class_pairs.setdefault(key, f'{s} a {o}' if len(class_pairs) < 1000 else None)
+                continue
+            if in_class_file:
+                continue
+            if p == DEFAULT_GEOMETRY or p == HAS_GEOMETRY:
+                key = hash(s)
+                geo_features.add(key)
+                _remember(names, key, s, 1000)
+                if p == DEFAULT_GEOMETRY:
+                    default_geometries[key] = default_geometries.get(key, 0) + 1
+            elif p == SF_WITHIN and isinstance(o, str):
+                key = hash((s, o))
+                if contains.pop(key, False) is False:
+                    within[key] = f'{s} sfWithin {o}' if len(within) < 1000 else None
+            elif p == SF_CONTAINS and isinstance(o, str):
+                key = hash((o, s))
+                if within.pop(key, False) is False:
+                    contains[key] = f'{s} sfContains {o}' if len(contains) < 1000 else None
+            elif p == AS_WKT and isinstance(o, tuple):
+                wkt_batch.append((s, o[0]))
+                if len(wkt_batch) >= WKT_BATCH:
+                    _check_wkt(wkt_batch, errors, examples, max_examples)
+            elif p == CELL_ID:
+                m = _CELL_IRI.search(s)
+                key = hash(s)
+                cells.add(key)
+                _remember(names, key, s, 1000)
+                value = o[0] if isinstance(o, tuple) else o
+                matches = m is not None and m.group(2) == value and value.isdigit()
+                if not matches or cell_level(int(value)) != int(m.group(1)):
+                    errors['cell_id_mismatch'] += 1
+                    if len(examples['cell_id_mismatch']) < max_examples:
+                        examples['cell_id_mismatch'].append(f'{s} cellID {value}')
+        errors['syntax'] += len(syntax_errors)
+        examples['syntax'] += [f'{infile}: {message}' for _, message in syntax_errors][:max_examples]
+    if wkt_batch:
+        _check_wkt(wkt_batch, errors, examples, max_examples)
+
+    # Cross-statement checks
+    for key in geo_features | cells:
+        count = default_geometries.get(key, 0)
+        failed = [check for check, failed in [('default_geometry_missing', key in geo_features and count == 0),
+                                              ('default_geometry_multiple', count > 1),
+                                              ('type_missing', key not in typed)] if failed]
+        for check in failed:
+            errors[check] += 1
+            if len(examples[check]) < max_examples and key in names:
+                examples[check].append(names[key])
+    for check, unmatched in [('within_without_contains', within), ('contains_without_within', contains)]:
+        errors[check] = len(unmatched)
+        examples[check] = [text for text in unmatched.values() if text][:max_examples]
+    if class_files:
+        missing = [key for key in class_pairs if key not in class_statements]
+        errors['class_statement_missing'] = len(missing)
+        examples['class_statement_missing'] = [class_pairs[key] for key in missing if class_pairs[key]][:max_examples]
+    return {'files': len(infiles) + len(class_files), 'triples': n_triples, 'errors': errors, 'examples': examples}
+
+
+def write_report(report: dict) -> None:
+    """Prints (and logs) the error counts and examples of a validation report
+
+    :param report: a dictionary returned by validate_files
+    :return: None
+    """
+    lines = [f"{report['files']} files, {report['triples']} triples"]
+    for check, description in CHECKS.items():
+        count = report['errors'][check]
+        lines.append(f'{check:27} {count:>10}   {description}')
+        lines += ['        ' + example for example in report['examples'][check]]
+    lines.append(f"{'total':27} {sum(report['errors'].values()):>10}")
+    for line in lines:
+        print(line)
+        logger.info(line)
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_validate.txt')
+    start_time = time.time()
+    logger.info(f'Launching script: validate {ttl_files} with class statements {class_statement_files}')
+    validation = validate_files(ttl_files, class_statement_files)
+    write_report(validation)
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    # A non-zero exit code fails the (nightly) build
+    sys.exit(1 if sum(validation['errors'].values()) else 0)
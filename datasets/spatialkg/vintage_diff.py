@@ -0,0 +1,205 @@
+"""Compute the triples added and removed between two builds (vintages) of a .ttl file
+
+Refreshing a repository with a new build (e.g., a new year of county subdivision shapefiles or a new KWG
+extract) need not drop and reload whole files: only the triples that changed have to be applied.
+
+Both builds are streamed one statement at a time (spatialkg.turtle), so neither is loaded into a graph. The first
+pass reduces each subject's triples to a 64-bit content hash (independent of the order of the triples); subjects
+whose hashes match are unchanged and skipped. The second pass re-reads the files and keeps only the triples of
+the subjects that were added, removed, or changed, which are then compared triple by triple. The delta is written
+as an RDF Patch (https://afs.github.io/rdf-patch/) or as SPARQL Update DELETE DATA / INSERT DATA operations in
+batches of a given number of triples.
+Note: blank nodes are compared by label, so files with blank nodes should not be diffed (none of the dataset
+scripts write blank nodes).
+
+Under ### Input Files ###, define
+    the path/filename of the previous build of a .ttl file
+    the path/filename of the new build of the .ttl file
+Under ### Output ###, define
+    the path/filename for the output delta
+    the format of the delta: 'patch' (RDF Patch) or 'sparql' (SPARQL Update)
+    the number of triples per DELETE DATA / INSERT DATA operation
+    the IRI of the named graph to update (or None for the default graph)
+
+Required:
+    * datetime, hashlib, logging, time
+
+Functions:
+    * subject_hashes - returns a content hash of each subject's triples in a .ttl file
+    * subject_lines - returns the triples of some subjects in a .ttl file in N-Triples syntax
+    * diff_files - returns the triples removed and added between two .ttl files
+    * write_rdf_patch - writes removed and added triples as an RDF Patch
+    * write_sparql_update - writes removed and added triples as batches of DELETE DATA / INSERT DATA operations
+    * write_delta - writes removed and added triples in either format
+"""
+import datetime
+import hashlib
+import logging
+import time
+
+from .turtle import nt_term, read_triples
+
+### Input Files ###
+old_file = 'ttl_files/AdministrativeRegion_3/me_23_admin-regions_level-3_2022.ttl'
+new_file = 'ttl_files/AdministrativeRegion_3/me_23_admin-regions_level-3.ttl'
+
+### Output ###
+delta_file = 'ttl_files/AdministrativeRegion_3/me_23_admin-regions_level-3_delta.rdfp'
+delta_format = 'patch'
+batch_size = 10000
+named_graph = None
+
+logger = logging.getLogger(__name__)
+
+
+def _lines(infile: str):
+    """Yields the subject and the N-Triples line (without the final ' .') of each triple of a .ttl file"""
+    for s, p, o in read_triples(infile):
+        yield s, f'{nt_term(s)} <{p}> {nt_term(o)}'
+
+
+def subject_hashes(infile: str) -> dict:
+    """Returns a content hash of each subject's triples in a .ttl file (independent of the order of the triples)
+
+    :param infile: path/filename of a .ttl (or .nt) file
+    :return: a dictionary of subject -> 64-bit hash (the sum of the hashes of the subject's triples)
+    """
+    hashes = {}
+    for s, line in _lines(infile):
+        digest = int.from_bytes(hashlib.blake2b(line.encode('utf-8'), digest_size=8).digest(), 'big')
+        hashes[s] = (hashes.get(s, 0) + digest) & 0xFFFFFFFFFFFFFFFF
+    return hashes
+
+
+def subject_lines(infile: str, subjects: set) -> dict:
+    """Returns the triples of some subjects in a .ttl file in N-Triples syntax
+
+    :param infile: path/filename of a .ttl (or .nt) file
+    :param subjects: a set of subjects (IRIs or blank node labels)
+    :return: a dictionary of subject -> set of triples in N-Triples syntax (without the final ' .')
+    """
+    lines = {}
+    for s, line in _lines(infile):
+        if s in subjects:
+            lines.setdefault(s, set()).add(line)
+    return lines
+
+
+def diff_files(old_infile: str, new_infile: str) -> tuple:
+    """Returns the triples removed and added between two builds of a .ttl file
+
+    Each file is read twice (see the module docstring); only the triples of changed subjects are kept in memory.
+
+    :param old_infile: path/filename of the previous build
+    :param new_infile: path/filename of the new build
+    :return: a sorted list of removed triples and a sorted list of added triples (in N-Triples syntax, without
+             the final ' .'), and a dictionary of subject counts
+    """
+    old_hashes, new_hashes = subject_hashes(old_infile), subject_hashes(new_infile)
+    stats = {'unchanged': 0, 'changed': 0, 'added': 0, 'removed': 0}
+    for s, digest in new_hashes.items():
+        if s not in old_hashes:
+            stats['added'] += 1
+        elif old_hashes[s] != digest:
+            stats['changed'] += 1
+        else:
+            stats['unchanged'] += 1
+    stats['removed'] = len(old_hashes.keys() - new_hashes.keys())
+    changed = {s for s in old_hashes.keys() | new_hashes.keys() if old_hashes.get(s) != new_hashes.get(s)}
+    del old_hashes, new_hashes
+
+    old_lines, new_lines = subject_lines(old_infile, changed), subject_lines(new_infile, changed)
+    removed, added = [], []
+    for s in changed:
+        old_set, new_set = old_lines.get(s, set()), new_lines.get(s, set())
+        removed.extend(old_set - new_set)
+        added.extend(new_set - old_set)
+    removed.sort()
+    added.sort()
+    logger.info(f'{old_infile} -> {new_infile}: subjects {stats}; '
+                f'{len(removed)} triples removed, {len(added)} triples added')
+    return removed, added, stats
+
+
+def write_rdf_patch(removed: list, added: list, outfile: str) -> None:
+    """Writes removed and added triples as a single RDF Patch transaction (deletes before adds)
+
+    :param removed: a list of triples to delete in N-Triples syntax (without the final ' .')
+    :param added: a list of triples to add in N-Triples syntax (without the final ' .')
+    :param outfile: path/filename for the output .rdfp file
+    :return: None
+    """
+    with open(outfile, 'w', encoding='utf-8') as f:
+        f.write('TX .\n')
+        for line in removed:
+            f.write('D ' + line + ' .\n')
+        for line in added:
+            f.write('A ' + line + ' .\n')
+        f.write('TC .\n')
+
+
+def _update_operations(operation: str, triples: list, size: int, graph: str = None):
+    """Yields DELETE DATA or INSERT DATA operations of at most size triples each"""
+    for start in range(0, len(triples), size):
+        body = ''.join('    ' + line + ' .\n' for line in triples[start:start + size])
+        if graph:
+            body = f'  GRAPH <{graph}> {{\n{body}  }}\n'
+        yield f'{operation} {{\n{body}}}'
+
+
+def write_sparql_update(removed: list, added: list, outfile: str, size: int = 10000, graph: str = None) -> None:
+    """Writes removed and added triples as SPARQL Update DELETE DATA / INSERT DATA operations (deletes first)
+
+    Operations are separated by ';' so the file is a single update request; each operation holds at most size
+    triples so it can also be split and sent in batches.
+
+    :param removed: a list of triples to delete in N-Triples syntax (without the final ' .')
+    :param added: a list of triples to insert in N-Triples syntax (without the final ' .')
+    :param outfile: path/filename for the output .ru file
+    :param size: the maximum number of triples per operation
+    :param graph: the IRI of the named graph to update (or None for the default graph)
+    :return: None
+    """
+    operations = list(_update_operations('DELETE DATA', removed, size, graph))
+    operations += list(_update_operations('INSERT DATA', added, size, graph))
+    with open(outfile, 'w', encoding='utf-8') as f:
+        f.write(' ;\n'.join(operations))
+        if operations:
+            f.write('\n')
+
+
+def write_delta(removed: list, added: list, outfile: str, fmt: str = 'patch', size: int = 10000,
+                graph: str = None) -> None:
+    """Writes removed and added triples as an RDF Patch ('patch') or SPARQL Update ('sparql')
+
+    :param removed: a list of triples to delete in N-Triples syntax (without the final ' .')
+    :param added: a list of triples to add in N-Triples syntax (without the final ' .')
+    :param outfile: path/filename for the output file
+    :param fmt: 'patch' or 'sparql'
+    :param size: the maximum number of triples per SPARQL Update operation
+    :param graph: the IRI of the named graph to update (SPARQL Update only)
+    :return: None
+    """
+    if fmt == 'patch':
+        write_rdf_patch(removed, added, outfile)
+    elif fmt == 'sparql':
+        write_sparql_update(removed, added, outfile, size, graph)
+    else:
+        raise ValueError(f"Unknown delta format: {fmt} (expected 'patch' or 'sparql')")
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_vintage_diff.txt')
+    start_time = time.time()
+    logger.info(f'Launching script: {old_file} -> {new_file}')
+    triples_removed, triples_added, subject_counts = diff_files(old_file, new_file)
+    print(f'Subjects: {subject_counts}')
+    print(f'{len(triples_removed)} triples removed, {len(triples_added)} triples added')
+    write_delta(triples_removed, triples_added, delta_file, delta_format, batch_size, named_graph)
+    logger.info(f'Wrote the delta to {delta_file}')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
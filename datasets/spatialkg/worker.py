@@ -0,0 +1,311 @@
+"""A long-running worker that builds the .ttl files for states from jobs in a local queue
+
+Running the dataset scripts once per state pays for the same start-up work every time: importing pandas,
+geopandas, and rdflib, reading the State-County-FIPS table, loading the project namespaces, and opening a new
+HTTPS connection to KnowWhereGraph. The worker does that work once and then processes state build jobs as they
+are submitted.
+
+The queue is a folder with four subfolders: pending/, running/, done/, and failed/. A job is a .json file in
+pending/ of the form
+    {"state": "Maine", "stages": ["s2_cells", "county_s2_integration", ...], "upload": true}
+("stages" is optional and defaults to DEFAULT_STAGES; with "upload": true the files written by each stage are
+uploaded to the state's named graph in the Spatial repository while the next stage runs). The worker claims the
+oldest pending job by moving it to running/ (so several workers can share a queue), runs its stages in order,
+and moves it to done/ or failed/ with the runtime of each stage (and the error, if any) added to the job.
+
+Under ### Queue ###, define
+    the path of the queue folder (relative to the Spatial folder)
+    the number of seconds to wait between checks of an empty queue
+    True to exit when the queue is empty (e.g., to process a batch of jobs) or False to wait for new jobs
+Under ### Upload ###, define
+    the number of parallel connections used to upload the files of jobs with "upload": true
+
+Run as a module from this folder (the datasets folder): python -m spatialkg.worker
+
+Required:
+    * spatialkg (geopandas, pandas, rdflib, requests, numpy, and shapely)
+    * namespaces (a local .py file with a dictionary of project namespaces)
+    * datetime, json, logging, os, time
+
+Functions:
+    * submit_job - adds a state build job to the queue
+    * warm_up - imports the heavy libraries and loads the FIPS table, namespaces, and KWG session once
+    * run_job - runs the stages of a job for its state
+    * claim_job - moves the oldest pending job to running/ and returns it
+    * serve - processes jobs from the queue until it is empty (or forever)
+"""
+import datetime
+import json
+import logging
+import os
+import time
+
+from .config import FIPS_TABLE, KWG_ENDPOINT, KWG_RESOURCE, LEVEL1_OUTFILE, LEVEL2_OUTPATH, STORE_ENDPOINT
+
+### Queue ###
+queue_dir = 'queue/'
+poll_interval = 5
+exit_when_empty = False
+### Upload ###
+upload_connections = 4
+
+QUEUE_FOLDERS = ['pending', 'running', 'done', 'failed']
+
+# Stages in the order they are run when a job does not list its stages
+DEFAULT_STAGES = ['s2_cells', 'county_s2_integration', 'state_s2_integration', 's2_class_statements',
+                  'county_subdivisions', 'county_subdivision_s2_integration', 'part_of_closure',
+                  'admin_class_statements']
+
+logger = logging.getLogger(__name__)
+
+
+def _states(name: str, table: str) -> None:
+    # The states file is national; name is ignored
+    from .admin_regions import admin_regions_level1_2ttl
+    admin_regions_level1_2ttl(KWG_ENDPOINT, LEVEL1_OUTFILE)
+
+
+def _counties(name: str, table: str) -> None:
+    from .admin_regions import admin_regions_level2_2ttl
+    from .fips import get_state_identifiers
+    fips = get_state_identifiers(table, name)[1]
+    admin_regions_level2_2ttl(KWG_ENDPOINT, LEVEL2_OUTPATH, [KWG_RESOURCE + 'administrativeRegion.USA.' + fips])
+
+
+def _s2_cells(name: str, table: str) -> None:
+    from .s2_cells import state_s2_cells_2ttl
+    state_s2_cells_2ttl(name, KWG_ENDPOINT, table)
+
+
+def _county_s2_integration(name: str, table: str) -> None:
+    from .s2_cells import county_s2_cell_integration_2ttl
+    county_s2_cell_integration_2ttl(name, KWG_ENDPOINT, table)
+
+
+def _state_s2_integration(name: str, table: str) -> None:
+    from .s2_cells import state_s2_cell_rollup_2ttl
+    state_s2_cell_rollup_2ttl(name, table)
+
+
+def _state_s2_integration_kwg(name: str, table: str) -> None:
+    from .s2_cells import state_s2_cell_integration_2ttl
+    state_s2_cell_integration_2ttl(name, KWG_ENDPOINT, table)
+
+
+def _s2_class_statements(name: str, table: str) -> None:
+    from .class_statements import state_s2_cell_class_stmts_2ttl
+    state_s2_cell_class_stmts_2ttl(name, table)
+
+
+def _county_subdivisions(name: str, table: str) -> None:
+    from .admin_regions import county_subs_2ttl, get_input_file_name, get_output_file_name
+    from .fips import get_state_identifiers, read_fips_table
+    abbr, fips = get_state_identifiers(table, name)[:2]
+    df_fips_county = read_fips_table(table)[["CountyFIPS", "CountyName"]].drop_duplicates()
+    county_subs_2ttl(name, get_input_file_name(fips), get_output_file_name(abbr, fips), df_fips_county)
+
+
+def _county_subdivision_s2_integration(name: str, table: str) -> None:
+    from .admin_regions import get_input_file_name, get_s2_file_name, get_s2_output_file_name
+    from .fips import get_state_identifiers
+    from .namespaces import get_prefixes
+    from .s2_cell_integration import county_subs_s2_cell_integration_2ttl
+    abbr, fips = get_state_identifiers(table, name)[:2]
+    county_subs_s2_cell_integration_2ttl(get_input_file_name(fips), get_s2_file_name(abbr, fips),
+                                         get_s2_output_file_name(abbr, fips), get_prefixes())
+
+
+def _part_of_closure(name: str, table: str) -> None:
+    from .admin_regions import get_output_file_name, get_part_of_closure_file_name
+    from .fips import get_state_identifiers
+    from .namespaces import get_prefixes
+    from .s2_cell_rollup import part_of_closure_2ttl
+    abbr, fips = get_state_identifiers(table, name)[:2]
+    part_of_closure_2ttl([LEVEL1_OUTFILE,
+                          LEVEL2_OUTPATH + abbr + '_' + fips + '_admin-regions_level-2.ttl',
+                          get_output_file_name(abbr, fips)],
+                         get_part_of_closure_file_name(abbr, fips),
+                         get_prefixes())
+
+
+def _admin_class_statements(name: str, table: str) -> None:
+    from .class_statements import state_admin_region_class_stmts_2ttl
+    from .fips import get_state_identifiers
+    abbr, fips = get_state_identifiers(table, name)[:2]
+    state_admin_region_class_stmts_2ttl(abbr, fips)
+
+
+def _partition_s2_outputs(name: str, table: str) -> None:
+    from .fips import get_state_identifiers
+    from .partition import partition_state_outputs
+    abbr, fips = get_state_identifiers(table, name)[:2]
+    partition_state_outputs(abbr, fips)
+
+
+# Stage name -> function of (state name, State-County-FIPS table); see spatialkg.build for their dependencies
+STAGES = {
+    'states': _states,
+    'counties': _counties,
+    's2_cells': _s2_cells,
+    'county_s2_integration': _county_s2_integration,
+    'state_s2_integration': _state_s2_integration,
+    'state_s2_integration_kwg': _state_s2_integration_kwg,
+    's2_class_statements': _s2_class_statements,
+    'county_subdivisions': _county_subdivisions,
+    'county_subdivision_s2_integration': _county_subdivision_s2_integration,
+    'part_of_closure': _part_of_closure,
+    'admin_class_statements': _admin_class_statements,
+    'partition_s2_outputs': _partition_s2_outputs,
+}
+
+
+def _make_queue(queue: str) -> None:
+    for folder in QUEUE_FOLDERS:
+        os.makedirs(os.path.join(queue, folder), exist_ok=True)
+
+
+def submit_job(queue: str, state: str, stages: list = None, upload: bool = False) -> str:
+    """Adds a state build job to the queue
+
+    :param queue: path of the queue folder
+    :param state: a string of a state's proper name (e.g., 'Alabama')
+    :param stages: the names of the stages to run, in order (see STAGES); defaults to DEFAULT_STAGES
+    :param upload: True to upload the files written by the stages to the state's named graph
+    :return: the path/filename of the job file
+    """
+    stages = stages or DEFAULT_STAGES
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        raise ValueError(f'Unknown stage(s): {unknown}')
+    _make_queue(queue)
+    job_name = str(time.time_ns()) + '_' + state.lower().replace(' ', '-') + '.json'
+    temp_file = os.path.join(queue, job_name + '.tmp')
+    job_file = os.path.join(queue, 'pending', job_name)
+    with open(temp_file, 'w') as f:
+        json.dump({'state': state, 'stages': stages, 'upload': upload}, f)
+    os.replace(temp_file, job_file)  # The job appears in pending/ only once it is complete
+    return job_file
+
+
+def warm_up(table: str = FIPS_TABLE) -> None:
+    """Does the start-up work shared by all jobs once: imports the heavy libraries, reads the State-County-FIPS
+          table, loads the project namespaces, loads the rdflib Turtle plugins, and opens the KWG session
+
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: None
+    """
+    from . import admin_regions, class_statements, s2_cell_integration, s2_cell_rollup, s2_cells  # noqa: F401
+    from .fips import read_fips_table
+    from .kwg import get_session
+    from .namespaces import get_prefixes
+    read_fips_table(table)
+    _PREFIX = get_prefixes()
+    admin_regions.initial_kg(_PREFIX).serialize(format='turtle')
+    get_session(KWG_ENDPOINT)
+    logger.info('Worker warmed up')
+
+
+def run_job(job: dict, table: str = FIPS_TABLE) -> dict:
+    """Runs the stages of a job, in order, for the job's state
+
+    If the job has "upload": true, the .ttl files written by each stage are uploaded to the state's named graph
+    (see spatialkg.upload) while the next stage runs; the upload statistics are added to the job.
+
+    :param job: a dictionary with a 'state' (proper name) and, optionally, a list of 'stages' and 'upload'
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :return: a dictionary of stage name -> runtime in seconds
+    """
+    loader = graph = abbr = fips = None
+    if job.get('upload'):
+        from .fips import get_state_identifiers
+        from .upload import GraphStoreLoader, state_graph_iri
+        abbr, fips = get_state_identifiers(table, job['state'])[:2]
+        graph = state_graph_iri(abbr, fips)
+        loader = GraphStoreLoader(STORE_ENDPOINT, upload_connections).start()
+    runtimes = {}
+    try:
+        for stage in job.get('stages') or DEFAULT_STAGES:
+            logger.info(f"Stage {stage} for {job['state']}")
+            start_time = time.time()
+            STAGES[stage](job['state'], table)
+            runtimes[stage] = round(time.time() - start_time, 3)
+            if loader:
+                from .upload import state_output_files
+                for outfile in state_output_files(abbr, fips, since=start_time):
+                    loader.add_file(outfile, graph)
+    finally:
+        from .terms import clear_cache
+        clear_cache()  # Do not keep one state's interned IRIs while the next job runs
+        if loader:
+            job['upload_stats'] = loader.close()
+    if loader and job['upload_stats']['failed']:
+        raise RuntimeError(f"{len(job['upload_stats']['failed'])} chunks failed to upload to {graph}")
+    return runtimes
+
+
+def claim_job(queue: str) -> tuple:
+    """Moves the oldest pending job to running/ and returns it
+
+    :param queue: path of the queue folder
+    :return: the path/filename of the claimed job file and the job, or (None, None) if no job is pending
+    """
+    pending = os.path.join(queue, 'pending')
+    for job_name in sorted(os.listdir(pending)):
+        running_file = os.path.join(queue, 'running', job_name)
+        try:
+            os.rename(os.path.join(pending, job_name), running_file)
+        except OSError:
+            continue  # Claimed by another worker
+        with open(running_file, 'r') as f:
+            return running_file, json.load(f)
+    return None, None
+
+
+def serve(queue: str, table: str = FIPS_TABLE, interval: float = 5, exit_when_empty: bool = False) -> int:
+    """Processes state build jobs from the queue
+
+    :param queue: path of the queue folder
+    :param table: path/filename to a .tsv table of State-County-FIPS info
+    :param interval: the number of seconds to wait between checks of an empty queue
+    :param exit_when_empty: True to return when the queue is empty, False to wait for new jobs
+    :return: the number of jobs processed
+    """
+    _make_queue(queue)
+    warm_up(table)
+    count = 0
+    while True:
+        job_file, job = claim_job(queue)
+        if job_file is None:
+            if exit_when_empty:
+                return count
+            time.sleep(interval)
+            continue
+        logger.info(f"Job {os.path.basename(job_file)}: {job['state']}")
+        start_time = time.time()
+        try:
+            job['runtimes'] = run_job(job, table)
+            status = 'done'
+        except Exception as e:
+            logger.exception(f'Job {os.path.basename(job_file)} failed')
+            job['error'] = repr(e)
+            status = 'failed'
+        job['runtime'] = str(datetime.timedelta(seconds=time.time() - start_time))
+        with open(job_file, 'w') as f:
+            json.dump(job, f, indent=2)
+        os.replace(job_file, os.path.join(queue, status, os.path.basename(job_file)))
+        print(f"{job['state']}: {status} ({job['runtime']} HMS)")
+        count += 1
+
+
+if __name__ == "__main__":
+    from .config import set_working_directory, setup_logging
+
+    # Set the current directory to the Spatial folder
+    set_working_directory()
+    logger = setup_logging('logs/log_spatialkg_worker.txt')
+    start_time = time.time()
+    logger.info(f'Launching worker: queue = {queue_dir}')
+    n_jobs = serve(queue_dir, FIPS_TABLE, poll_interval, exit_when_empty)
+    logger.info(f'{n_jobs} jobs processed')
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
@@ -0,0 +1,278 @@
+"""Benchmark the sparql/basics query suite against a local, in-process SPARQL store
+
+Each .rq file in sparql/basics holds one or more variants of the same query (e.g., a GraphDB version and
+a FRINK version) separated by '### ... ###' header lines. This script loads the generated .ttl outputs into
+an embedded store, splits every .rq file into its variants, executes each variant repeatedly, and reports
+latency percentiles and result counts so the formulations can be compared with numbers instead of comments.
+
+GraphDB variants wrap their patterns in SERVICE <repository:...> blocks; these are unwrapped so that the
+patterns run against the local store. Variants that use a transitive property path (e.g.,
+kwg-ont:administrativePartOf+) are also run with each path expanded to a bounded alternation
+(p|p/p|p/p/p) so the cost of the path operator is reported alongside the original timing.
+
+Under ### Input Files ###, define
+    the glob patterns of the .ttl files to load into the store
+Under ### Benchmark Settings ###, define
+    the embedded store to use ('rdflib' or 'oxigraph'),
+    the number of timed runs per variant,
+    the maximum hop count used when expanding transitive property paths, and
+    the path/filename for the .csv report
+
+Required:
+    * rdflib (Graph and prepareQuery)
+    * pyoxigraph (optional; only needed when store = 'oxigraph')
+    * csv, datetime, glob, logging, pathlib, re, time
+
+Functions:
+    * load_store - loads a set of .ttl files into an embedded SPARQL store
+    * split_variants - splits the text of a .rq file into its named query variants
+    * localize_query - removes SERVICE <repository:...> wrappers so a query runs against the local store
+    * expand_property_paths - replaces transitive (+) property paths with a bounded alternation
+    * expand_dotted_names - rewrites prefixed names with several dots as full IRIs (for pyoxigraph)
+    * percentile - nearest-rank percentile of a list of timings
+    * time_query - executes a query repeatedly and returns its timings and result count
+    * benchmark_suite - benchmarks every variant of every .rq file in a folder
+    * write_report - writes the benchmark results to a .csv file
+"""
+import csv
+import datetime
+import glob
+import logging
+import re
+import time
+from pathlib import Path
+
+### Input Files ###
+ttl_patterns = ['ttl_files/AdministrativeRegion_1/*.ttl',
+                'ttl_files/AdministrativeRegion_2/*.ttl',
+                'ttl_files/AdministrativeRegion_3/*.ttl',
+                'ttl_files/S2_cells/*.ttl']
+
+### Benchmark Settings ###
+store_type = 'rdflib'  # 'rdflib' or 'oxigraph'
+runs = 5
+max_path_hops = 3  # cousub -> county -> state -> country
+report_file = 'benchmark_basics.csv'
+
+query_folder = Path(__file__).resolve().parent / 'basics'
+
+logger = logging.getLogger(__name__)
+
+# Matches variant headers such as '### GraphDB Version ###' or '## Another FRINK Version (slower) ###'
+_VARIANT_HEADER = re.compile(r'^\s*#{2,}\s*(?P<name>[^#].*?)\s*#{2,}\s*$')
+# Matches GraphDB federation wrappers such as 'SERVICE <repository:Spatial>'
+_SERVICE_WRAPPER = re.compile(r'SERVICE\s+<repository:[^>]*>\s*', re.IGNORECASE)
+# Matches a transitive property path on a prefixed name or full IRI (e.g., kwg-ont:administrativePartOf+)
+_TRANSITIVE_PATH = re.compile(r'(?P<path>(?:[A-Za-z][\w-]*)?:\w+|<[^>\s]+>)\+')
+# Matches PREFIX declarations and prefixed names with two or more inner dots (e.g., kwgr:administrativeRegion.USA.23)
+_PREFIX_DECL = re.compile(r'PREFIX\s+(?P<prefix>[A-Za-z][\w-]*)?:\s*<(?P<iri>[^>]*)>', re.IGNORECASE)
+_DOTTED_NAME = re.compile(r'(?<![\w<?$-])(?P<prefix>[A-Za-z][\w-]*)?:(?P<local>\w+(?:\.\w+){2,})')
+
+
+def load_store(patterns: list, store: str = 'rdflib'):
+    """Loads every .ttl file matching a list of glob patterns into an embedded SPARQL store
+
+    :param patterns: a list of glob patterns for .ttl files (e.g., 'ttl_files/S2_cells/*.ttl')
+    :param store: the embedded store to use, either 'rdflib' or 'oxigraph'
+    :return: an RDFLib Graph or a pyoxigraph Store holding the triples of all matching files
+    """
+    files = sorted({f for pattern in patterns for f in glob.glob(pattern)})
+    if store == 'oxigraph':
+        import pyoxigraph
+        kg = pyoxigraph.Store()
+        for f in files:
+            logger.info(f'   Load {f}')
+            kg.bulk_load(path=f, format=pyoxigraph.RdfFormat.TURTLE)
+    elif store == 'rdflib':
+        from rdflib import Graph
+        kg = Graph()
+        for f in files:
+            logger.info(f'   Load {f}')
+            kg.parse(f, format='turtle')
+    else:
+        raise ValueError(f'Unknown store type: {store}')
+    logger.info(f'Loaded {len(files)} files into {store}')
+    return kg
+
+
+def split_variants(text: str) -> list:
+    """Splits the text of a .rq file into its named query variants
+
+    Comment lines before the first variant header are treated as a description and dropped. A file
+    without any variant headers is returned as a single variant named 'Default'.
+
+    :param text: the contents of a .rq file
+    :return: a list of (variant name, query text) tuples in file order
+    """
+    variants = []
+    name, lines = None, []
+    for line in text.splitlines():
+        match = _VARIANT_HEADER.match(line)
+        if match:
+            if name is not None:
+                variants.append((name, '\n'.join(lines).strip()))
+            name, lines = match.group('name'), []
+        else:
+            lines.append(line)
+    if name is None:
+        return [('Default', text.strip())]
+    variants.append((name, '\n'.join(lines).strip()))
+    return [(n, q) for n, q in variants if q]
+
+
+def localize_query(query: str) -> str:
+    """Removes GraphDB SERVICE <repository:...> wrappers so the enclosed patterns run against the local store
+
+    The braces of a SERVICE block are kept, so its contents become an ordinary group graph pattern.
+
+    :param query: a SPARQL query string
+    :return: the query without SERVICE <repository:...> keywords
+    """
+    return _SERVICE_WRAPPER.sub('', query)
+
+
+def expand_property_paths(query: str, hops: int) -> str:
+    """Replaces each transitive (+) property path with a bounded alternation of fixed-length paths
+
+    e.g., with hops = 3, kwg-ont:administrativePartOf+ becomes (p|p/p|p/p/p) for p = kwg-ont:administrativePartOf
+
+    :param query: a SPARQL query string
+    :param hops: the maximum path length to expand to
+    :return: the query with transitive paths replaced; unchanged if the query has none
+    """
+    def expand(match: re.Match) -> str:
+        path = match.group('path')
+        return '(' + '|'.join('/'.join([path] * n) for n in range(1, hops + 1)) + ')'
+    return _TRANSITIVE_PATH.sub(expand, query)
+
+
+def expand_dotted_names(query: str) -> str:
+    """Rewrites prefixed names that contain two or more dots (e.g., kwgr:administrativeRegion.USA.23) as full IRIs
+
+    pyoxigraph rejects such names even though they are valid SPARQL, so queries are rewritten before they are
+    sent to an oxigraph store.
+
+    :param query: a SPARQL query string
+    :return: the query with dotted prefixed names replaced by <...> IRIs
+    """
+    prefixes = {m.group('prefix') or '': m.group('iri') for m in _PREFIX_DECL.finditer(query)}
+
+    def expand(match: re.Match) -> str:
+        prefix = match.group('prefix') or ''
+        if prefix not in prefixes:
+            return match.group(0)
+        return '<' + prefixes[prefix] + match.group('local') + '>'
+    return _DOTTED_NAME.sub(expand, query)
+
+
+def percentile(timings: list, p: float) -> float:
+    """Returns the nearest-rank percentile of a list of timings
+
+    :param timings: a non-empty list of timings
+    :param p: the percentile to return (0-100)
+    :return: the timing at the given percentile
+    """
+    ordered = sorted(timings)
+    rank = max(1, -(-len(ordered) * p // 100))  # ceiling of n * p / 100
+    return ordered[int(rank) - 1]
+
+
+def time_query(kg, query: str, n: int) -> tuple:
+    """Executes a query n times (after one untimed warm-up run) against an embedded store
+
+    :param kg: an RDFLib Graph or a pyoxigraph Store
+    :param query: a SPARQL query string
+    :param n: the number of timed runs
+    :return: the query parse time (s), a list of execution times (s), and the number of results
+    """
+    if hasattr(kg, 'bulk_load'):  # pyoxigraph parses and plans inside query()
+        parse_time = 0.0
+        query = expand_dotted_names(query)
+        run = lambda: sum(1 for _ in kg.query(query))
+    else:
+        from rdflib.plugins.sparql import prepareQuery
+        start = time.perf_counter()
+        prepared = prepareQuery(query)
+        parse_time = time.perf_counter() - start
+        run = lambda: len(kg.query(prepared))
+    count = run()  # warm-up
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return parse_time, timings, count
+
+
+def benchmark_suite(kg, folder: Path, n: int, hops: int) -> list:
+    """Benchmarks every variant of every .rq file in a folder
+
+    :param kg: an RDFLib Graph or a pyoxigraph Store
+    :param folder: the folder containing .rq files
+    :param n: the number of timed runs per variant
+    :param hops: the maximum path length used when expanding transitive property paths
+    :return: a list of dictionaries, one per variant (and one per path-expanded variant)
+    """
+    results = []
+    for rq in sorted(folder.glob('*.rq')):
+        for name, query in split_variants(rq.read_text(encoding='utf-8')):
+            query = localize_query(query)
+            forms = [('', query)]
+            expanded = expand_property_paths(query, hops)
+            if expanded != query:
+                forms.append((f' (paths expanded to {hops} hops)', expanded))
+            for suffix, form in forms:
+                logger.info(f'   Run {rq.name}: {name}{suffix}')
+                try:
+                    parse_time, timings, count = time_query(kg, form, n)
+                except Exception as e:
+                    logger.info(f'   {rq.name}: {name}{suffix} failed: {e}')
+                    print(f'{rq.name}: {name}{suffix} failed: {e}')
+                    continue
+                results.append({'query': rq.name,
+                                'variant': name + suffix,
+                                'results': count,
+                                'parse_ms': round(parse_time * 1000, 2),
+                                'min_ms': round(min(timings) * 1000, 2),
+                                'p50_ms': round(percentile(timings, 50) * 1000, 2),
+                                'p90_ms': round(percentile(timings, 90) * 1000, 2),
+                                'p99_ms': round(percentile(timings, 99) * 1000, 2),
+                                'max_ms': round(max(timings) * 1000, 2)})
+    return results
+
+
+def write_report(results: list, outfile: str) -> None:
+    """Writes benchmark results to a .csv file and prints them as a table
+
+    :param results: a list of dictionaries as returned by benchmark_suite()
+    :param outfile: a path/filename for the output .csv file
+    :return: None
+    """
+    if not results:
+        print('No queries were benchmarked')
+        return
+    with open(outfile, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+    print(f'{"query":24} {"variant":60} {"results":>8} {"p50_ms":>10} {"p90_ms":>10} {"p99_ms":>10}')
+    for r in results:
+        print(f'{r["query"]:24} {r["variant"][:60]:60} {r["results"]:>8} '
+              f'{r["p50_ms"]:>10} {r["p90_ms"]:>10} {r["p99_ms"]:>10}')
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename='logs/log_benchmark_basics.txt',
+                        filemode='a',
+                        format='%(asctime)s %(levelname)-8s %(message)s',
+                        datefmt='%Y-%m-%d %H:%M:%S',
+                        level=logging.INFO)
+    logger.info('')
+    logger.info('LOGGER INITIALIZED')
+    start_time = time.time()
+    logger.info(f'Launching script: store = {store_type}, runs = {runs}')
+    store = load_store(ttl_patterns, store_type)
+    benchmark = benchmark_suite(store, query_folder, runs, max_path_hops)
+    write_report(benchmark, report_file)
+    print(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')
+    logger.info(f'Runtime: {str(datetime.timedelta(seconds=time.time() - start_time))} HMS')